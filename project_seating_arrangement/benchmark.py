@@ -0,0 +1,391 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import statistics
+import subprocess
+import pandas as pd
+from datetime import datetime
+
+from exam_scheduler import (
+    ALLOCATORS, INPUT_FILE_PATH, OPTIMAL_TIME_BUDGET, PHOTOS_DIRECTORY, CourseParser, CourseRollIndex,
+    DataLoader, DocumentGenerator, OptimalRoomAllocator, RoomRegistry, StudentRegistry
+)
+from document_creator import PDF_RENDERERS, THUMBNAIL_DPI, AttendanceSheetGenerator, PhotoManager
+from instrumentation import METRICS_FILE_NAME, metrics
+from workload_generator import add_workload_arguments, generate_workload, load_workload_info, workload_params
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE_PATH = os.path.join(PROJECT_DIRECTORY, 'benchmarks', 'results.jsonl')
+# Pipeline phases reported by `scale`, as sums of the run_metrics.json stages they consist of
+SCALE_PHASES = {
+    'load': ['load_workbook'],
+    'allocate': ['clash_detection', 'plan_session'],
+    'excel': ['create_excel_sheet', 'write_session_workbook'],
+    'pdf': ['generate_document'],
+    'reports': ['generate_reports'],
+}
+
+
+def legacy_create_excel_sheet(path, course, room, date, session, students):
+    """The pandas ExcelWriter implementation that RoomSheetWriter replaced, kept as a reference."""
+    df = pd.DataFrame(students)
+    
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        header = f'Course: {course} | Room: {room} | Date: {date} | Session: {session}'
+        header_df = pd.DataFrame([header])
+        header_df.to_excel(writer, index=False, header=False, startrow=0)
+        
+        ws = writer.sheets['Sheet1']
+        ws.merge_cells('A1:C1')
+        
+        df.to_excel(writer, sheet_name='Sheet1', index=False, startrow=2)
+        
+        ws.column_dimensions['A'].width = 15
+        ws.column_dimensions['B'].width = 30
+        ws.column_dimensions['C'].width = 20
+        
+        last_row = len(df) + 4
+        
+        last_row += 2
+        for i in range(5):
+            ws[f'A{last_row + i}'] = f"TA {i+1}:"
+        
+        last_row += 6
+        for i in range(5):
+            ws[f'A{last_row + i}'] = f"Invigilator {i+1}:"
+
+
+class BenchmarkTimer:
+    """Collects wall-clock samples for a named operation."""
+    
+    def __init__(self, name):
+        self.name = name
+        self.samples = []
+    
+    def run(self, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.samples.append(time.perf_counter() - start)
+        return result
+    
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            'name': self.name,
+            'runs': len(ordered),
+            'total_s': sum(ordered),
+            'p50_ms': 1000 * statistics.median(ordered),
+            'p95_ms': 1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        }
+
+
+def print_table(rows):
+    if not rows:
+        return
+    columns = list(rows[0].keys())
+    widths = {c: max(len(c), *(len(format_value(r[c])) for r in rows)) for c in columns}
+    print('  '.join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print('  '.join(format_value(row[c]).ljust(widths[c]) for c in columns))
+
+
+def format_value(value):
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+
+def sample_students(count):
+    return [
+        {'Roll Number': f"2401CS{i:04d}", 'Student Name': f"Student Number {i}", 'Signature': ''}
+        for i in range(count)
+    ]
+
+
+def bench_excel(args):
+    """Times the streaming room-sheet writer against the legacy pandas writer."""
+    students = sample_students(args.students)
+    workdir = tempfile.mkdtemp(prefix='bench_excel_')
+    engines = [
+        ('pandas ExcelWriter', legacy_create_excel_sheet),
+        ('write-only stream', DocumentGenerator.create_excel_sheet),
+    ]
+    
+    try:
+        rows = []
+        for label, writer in engines:
+            timer = BenchmarkTimer(label)
+            for i in range(args.files):
+                path = os.path.join(workdir, f"{i}.xlsx")
+                timer.run(writer, path, 'CS101', '10502', '01-05-2016', 'Morning', students)
+            rows.append(timer.summary())
+        
+        base = rows[0]['total_s']
+        for row in rows:
+            row['speedup'] = base / row['total_s'] if row['total_s'] else 0.0
+        
+        print(f"Room sheets: {args.files} files x {args.students} students")
+        print_table(rows)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def sample_sheet_jobs(photos_dir, documents, students):
+    """Attendance-sheet jobs drawing from a shared pool of students, so students recur across sheets."""
+    rolls = sorted(PhotoManager(photos_dir).photo_cache)
+    pool = [
+        {'Roll Number': rolls[i % len(rolls)] if rolls else f"2401CS{i:04d}",
+         'Student Name': f"Student {' '.join(['Number'] * (1 + i % 4))} {i}", 'Signature': ''}
+        for i in range(max(students, documents * students // 4))
+    ]
+    jobs = []
+    for d in range(documents):
+        start = (d * students // 2) % (len(pool) - students + 1)
+        records = pool[start:start + students]
+        jobs.append({'date': '01-05-2016', 'day': 'Sunday', 'session': 'Morning', 'room': f"R{d}",
+                     'course': 'CS101', 'students': records, 'count': len(records)})
+    return jobs
+
+
+def bench_pdf(args):
+    """Pages per second of each attendance-sheet renderer on the same jobs (and as one bundle with --bundle)."""
+    jobs = sample_sheet_jobs(args.photos, args.documents, args.students)
+    workdir = tempfile.mkdtemp(prefix='bench_pdf_')
+    
+    try:
+        rows = []
+        variants = [(renderer, output) for renderer in args.renderers
+                    for output in (['file', 'bundle'] if args.bundle else ['file'])]
+        for renderer, output in variants:
+            thumbnail_dir = os.path.join(workdir, 'thumbnails') if args.thumbnail_dpi else None
+            generator = AttendanceSheetGenerator(args.photos, thumbnail_dir=thumbnail_dir,
+                                                 thumbnail_dpi=args.thumbnail_dpi, renderer=renderer)
+            metrics.reset()
+            timer = BenchmarkTimer(renderer)
+            if output == 'bundle':
+                timer.run(generator.generate_bundle, os.path.join(workdir, f"{renderer}_bundle.pdf"), jobs)
+            else:
+                for i, job in enumerate(jobs):
+                    timer.run(generator.generate_document, output_path=os.path.join(workdir, f"{renderer}_{i}.pdf"), **job)
+            
+            summary = timer.summary()
+            pages = metrics.counters['pages_rendered']
+            rows.append({
+                'renderer': renderer, 'output': output, 'documents': summary['runs'], 'pages': pages,
+                'total_s': summary['total_s'], 'p50_ms': summary['p50_ms'], 'p95_ms': summary['p95_ms'],
+                'pages_per_s': pages / summary['total_s'] if summary['total_s'] else 0.0,
+                'kb_per_page': metrics.counters['bytes_written'] / 1024 / pages if pages else 0.0,
+                'images': f"{metrics.counters['images_embedded']}/{metrics.counters['images_placed']}",
+                'saved_kb': metrics.counters['image_bytes_saved'] / 1024,
+            })
+        
+        base = rows[0]['pages_per_s']
+        for row in rows:
+            row['speedup'] = row['pages_per_s'] / base if base else 0.0
+        
+        print(f"Attendance sheets: {args.documents} documents x {args.students} students")
+        print_table(rows)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def session_workloads(timetable, roll_index):
+    """Yields each session's courses sorted the way ExamScheduler hands them to the allocator."""
+    for _, row in timetable.dropna(subset=['Date']).iterrows():
+        for session in ['Morning', 'Evening']:
+            courses = CourseParser.extract_courses(row[session])
+            if courses:
+                pairs = [(course, roll_index.get_rolls(course)) for course in courses]
+                yield sorted(pairs, key=lambda x: len(x[1]), reverse=True)
+
+
+def bench_allocators(args):
+    """Compares rooms, buildings per course and floor spread of each allocator on the input timetable."""
+    timetable, enrollments, students, rooms = DataLoader(args.input).load_all_sheets()
+    roll_index = CourseRollIndex(enrollments, StudentRegistry(students, enrollments))
+    sessions = list(session_workloads(timetable, roll_index))
+    
+    rows = []
+    for strategy in args.modes:
+        for buffer in args.buffers:
+            registry = RoomRegistry(rooms, buffer)
+            for name in args.allocators:
+                options = {'time_budget': args.budget} if name == 'optimal' else {}
+                timer = BenchmarkTimer(name)
+                totals = [0, 0, 0]
+                unplaced = 0
+                for courses in sessions:
+                    allocator = ALLOCATORS[name](registry, strategy, **options)
+                    results = timer.run(allocator.allocate_session, courses)
+                    cost = OptimalRoomAllocator.allocation_cost(results)
+                    totals = [a + b for a, b in zip(totals, cost)]
+                    placed = sum(len(a['students']) for _, allocations in results for a in allocations)
+                    unplaced += sum(len(students) for _, students in courses) - placed
+                
+                summary = timer.summary()
+                rows.append({
+                    'mode': strategy, 'buffer': buffer, 'allocator': name,
+                    'rooms': totals[0], 'buildings': totals[1], 'floor_spread': totals[2],
+                    'unplaced': unplaced, 'total_s': summary['total_s'],
+                    'p50_ms': summary['p50_ms'], 'p95_ms': summary['p95_ms'],
+                })
+    
+    print(f"Allocators: {len(sessions)} sessions from {args.input}")
+    print_table(rows)
+
+
+def git_revision():
+    """(short commit, whether tracked files differ from it); ('unknown', False) outside a checkout."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIRECTORY,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no', '.'],
+                                cwd=PROJECT_DIRECTORY, capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+def prepare_workload(params, workload_dir):
+    """Reuses workload_dir when its workload.json matches params, otherwise regenerates it."""
+    info = load_workload_info(workload_dir)
+    if info is not None and info['params'] == params:
+        print(f"Reusing workload in {workload_dir}")
+        return info
+    print(f"Generating workload in {workload_dir} ...")
+    shutil.rmtree(workload_dir, ignore_errors=True)
+    generate_workload(workload_dir, **params)
+    return load_workload_info(workload_dir)
+
+
+def scale_signature(record):
+    return json.dumps([record['workload']['params'], record['config']], sort_keys=True)
+
+
+def bench_scale(args):
+    """Runs the whole pipeline on a synthetic workload and appends per-phase times to the results file."""
+    params = workload_params(args)
+    workload_dir = args.workload_dir or os.path.join(
+        tempfile.gettempdir(), 'seating_workloads',
+        '_'.join(f"{params[k]}" for k in ['students', 'courses', 'rooms', 'sessions', 'seed'])
+    )
+    workload = prepare_workload(params, workload_dir)
+    
+    # Caches and the manifest would turn a rerun into a no-op, so every run starts from scratch
+    for name in ['output', 'cache']:
+        shutil.rmtree(os.path.join(workload_dir, name), ignore_errors=True)
+    
+    command = [
+        sys.executable, os.path.join(PROJECT_DIRECTORY, 'exam_scheduler.py'), args.mode, str(args.buffer),
+        '--no-cache', '--rebuild', '--workers', str(args.workers), '--pdf-workers', str(args.pdf_workers),
+        '--excel-output', args.excel_output
+    ]
+    if args.no_pdf:
+        command.append('--no-pdf')
+    
+    print(f"Running: {' '.join(command[1:])}")
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=workload_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        print(f"Pipeline failed (exit {result.returncode}); see {os.path.join(workload_dir, 'output', 'error.log')}")
+        sys.exit(1)
+    
+    with open(os.path.join(workload_dir, 'output', METRICS_FILE_NAME)) as f:
+        run_metrics = json.load(f)
+    stages = run_metrics['stages']
+    
+    commit, dirty = git_revision()
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'dirty': dirty,
+        'label': args.label,
+        'workload': workload,
+        'config': {
+            'mode': args.mode, 'buffer': args.buffer, 'workers': args.workers,
+            'pdf_workers': args.pdf_workers, 'pdf': not args.no_pdf, 'excel_output': args.excel_output,
+        },
+        'phases_s': {
+            phase: round(sum(stages.get(name, {}).get('total_s', 0.0) for name in names), 4)
+            for phase, names in SCALE_PHASES.items()
+        },
+        'wall_s': round(wall, 3),
+        'counters': run_metrics['counters'],
+    }
+    
+    os.makedirs(os.path.dirname(args.results), exist_ok=True)
+    with open(args.results, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    
+    history = []
+    with open(args.results) as f:
+        for line in f:
+            if line.strip():
+                previous = json.loads(line)
+                if scale_signature(previous) == scale_signature(record):
+                    history.append(previous)
+    
+    rows = [
+        {'commit': r['commit'] + ('+' if r['dirty'] else ''), 'when': r['timestamp'], 'label': r['label'] or '',
+         **{f"{phase}_s": r['phases_s'][phase] for phase in SCALE_PHASES}, 'wall_s': r['wall_s']}
+        for r in history[-args.history:]
+    ]
+    print(f"Scale: {params['students']} students, {params['courses']} courses, {params['rooms']} rooms, "
+          f"{params['sessions']} sessions ({workload['counts']['enrollments']} enrollments), "
+          f"{args.mode} {args.buffer}")
+    print(f"Phase times are summed over worker processes; results appended to {args.results}")
+    print_table(rows)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Performance benchmarks for the seating pipeline")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    excel = commands.add_parser('excel', help="Room-sheet Excel writer throughput")
+    excel.add_argument('--files', type=int, default=200)
+    excel.add_argument('--students', type=int, default=40)
+    excel.set_defaults(func=bench_excel)
+    
+    pdf = commands.add_parser('pdf', help="Attendance-sheet renderer throughput (pages/second)")
+    pdf.add_argument('--documents', type=int, default=100)
+    pdf.add_argument('--students', type=int, default=40)
+    pdf.add_argument('--photos', default=PHOTOS_DIRECTORY)
+    pdf.add_argument('--thumbnail-dpi', type=int, default=THUMBNAIL_DPI)
+    pdf.add_argument('--renderers', nargs='+', choices=PDF_RENDERERS, default=PDF_RENDERERS)
+    pdf.add_argument('--bundle', action='store_true', help="Also render all documents as one bundle PDF")
+    pdf.set_defaults(func=bench_pdf)
+    
+    allocators = commands.add_parser('allocators', help="Greedy vs optimal room allocation quality and runtime")
+    allocators.add_argument('--input', default=INPUT_FILE_PATH)
+    allocators.add_argument('--modes', nargs='+', choices=['dense', 'sparse'], default=['dense', 'sparse'])
+    allocators.add_argument('--buffers', nargs='+', type=int, default=[0, 5, 10])
+    allocators.add_argument('--allocators', nargs='+', choices=sorted(ALLOCATORS), default=sorted(ALLOCATORS))
+    allocators.add_argument('--budget', type=float, default=OPTIMAL_TIME_BUDGET)
+    allocators.set_defaults(func=bench_allocators)
+    
+    scale = commands.add_parser('scale', help="Whole-pipeline phase times on a synthetic workload")
+    add_workload_arguments(scale)
+    scale.add_argument('--workload-dir', default=None,
+                       help="Where to generate (or reuse) the workload; defaults to a per-scale temp directory")
+    scale.add_argument('--mode', choices=['dense', 'sparse'], default='dense')
+    scale.add_argument('--buffer', type=int, default=5)
+    scale.add_argument('--workers', type=int, default=1)
+    scale.add_argument('--pdf-workers', type=int, default=1)
+    scale.add_argument('--excel-output', choices=['room', 'session'], default='room')
+    scale.add_argument('--no-pdf', action='store_true')
+    scale.add_argument('--label', default=None, help="Free-text note stored with the result")
+    scale.add_argument('--results', default=RESULTS_FILE_PATH)
+    scale.add_argument('--history', type=int, default=10, help="Previous matching results to show")
+    scale.set_defaults(func=bench_scale)
+    
+    return parser
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    arguments = build_parser().parse_args()
+    arguments.func(arguments)
@@ -1,22 +1,58 @@
+import io
 import os
+import json
+import hashlib
 import logging
+import functools
+from contextlib import contextmanager
+from collections import OrderedDict, defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, KeepTogether
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from reportlab.platypus.flowables import Image
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas as pdf_canvas
+from reportlab.platypus.flowables import Flowable, Image
 from reportlab.graphics.shapes import Drawing, Rect, String
 from reportlab.graphics import renderPDF
 from PIL import Image as PILImage
 
+from instrumentation import metrics
+
 PHOTOS_DIRECTORY = 'photos'
+LAYOUT_VERSION = 1
 DEFAULT_PHOTO = os.path.join(PHOTOS_DIRECTORY, 'nopic.png')
 COLUMNS_PER_ROW = 3
 PHOTO_WIDTH = 23 * mm
 PHOTO_HEIGHT = 23 * mm
 CORNER_RADIUS = 3 * mm
+FIRST_PAGE_STUDENTS = 15
+STUDENTS_PER_PAGE = 30
+THUMBNAIL_DPI = 200
+THUMBNAIL_QUALITY = 85
+VALIDATION_CACHE_SIZE = 4096
+CELL_CACHE_SIZE = 2048
+NAME_MAX_LINES = 3
+PDF_RENDERERS = ['platypus', 'canvas']
+
+
+@contextmanager
+def binary_streams():
+    """Writes the PDFs built inside as binary rather than ASCII85-armoured streams.
+    
+    Binary streams make the files ~15% smaller, so static forms cost less than inline drawing.
+    rl_config is process-wide, so the previous setting is restored for other reportlab users.
+    """
+    previous = rl_config.useA85
+    rl_config.useA85 = 0
+    try:
+        yield
+    finally:
+        rl_config.useA85 = previous
 
 
 class BorderDrawing:
@@ -47,10 +83,17 @@ class BorderDrawing:
 class PhotoManager:
     """Manages student photo retrieval and validation."""
     
-    def __init__(self, photos_dir=PHOTOS_DIRECTORY, default_img=DEFAULT_PHOTO):
+    def __init__(self, photos_dir=PHOTOS_DIRECTORY, default_img=DEFAULT_PHOTO,
+                 validation_cache_size=VALIDATION_CACHE_SIZE):
         self.photos_dir = photos_dir
         self.default_img = default_img
         self.photo_cache = {}
+        self.validation_cache_size = validation_cache_size
+        self.validated = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.digests = {}
+        self.canonical = {}
         self._initialize_cache()
     
     def _initialize_cache(self):
@@ -87,21 +130,206 @@ class PhotoManager:
             logging.error(f"nopic image not found at {self.default_img}")
             return None
     
+    def _file_info(self, path):
+        """(content hash, size in bytes) of an image file, or (None, 0) if it cannot be read."""
+        if path not in self.digests:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                self.digests[path] = (hashlib.sha1(data).hexdigest(), len(data))
+            except (OSError, TypeError):
+                self.digests[path] = (None, 0)
+        return self.digests[path]
+    
+    def get_photo_digest(self, roll_number):
+        """Content hash of the image a roll number will be rendered with."""
+        return self._file_info(self.photo_cache.get(str(roll_number).upper(), self.default_img))[0]
+    
+    def canonical_path(self, path):
+        """First path seen with the same content as path.
+        
+        reportlab embeds an image once per distinct file name in a document, so handing it one
+        path per content hash embeds identical photos (copies, nopic.png duplicates) only once.
+        """
+        digest = self._file_info(path)[0]
+        if digest is None:
+            return path
+        return self.canonical.setdefault(digest, path)
+    
+    def record_embedded_images(self, images):
+        """Counts one PDF's photo placements, the images it embeds and the bytes canonical_path saved.
+        
+        images holds a (source path, embedded path) pair per placed photo. reportlab embeds one image
+        per distinct embedded path; without canonical_path it would embed one per distinct source path.
+        """
+        sources = defaultdict(set)
+        for source, embedded in images:
+            if embedded:
+                sources[embedded].add(source)
+        metrics.count('images_placed', sum(1 for _, embedded in images if embedded))
+        metrics.count('images_embedded', len(sources))
+        metrics.count('image_bytes_saved', sum(
+            (len(paths) - 1) * self._file_info(embedded)[1] for embedded, paths in sources.items()
+        ))
+    
     def validate_photo(self, path, target_w, target_h):
+        if path in self.validated:
+            self.validated.move_to_end(path)
+            self.cache_hits += 1
+            return self.validated[path]
+        
+        self.cache_misses += 1
         try:
-            img = PILImage.open(path)
-            if img.mode not in ('RGB', 'RGBA'):
-                img = img.convert('RGB')
-            return path
+            with PILImage.open(path) as img:
+                img.load()
+            result = self.canonical_path(path)
         except Exception as err:
             logging.error(f"Error processing image {path}: {err}")
-            return self.default_img if os.path.exists(self.default_img) else None
+            result = self.default_img if os.path.exists(self.default_img) else None
+        
+        self.validated[path] = result
+        if len(self.validated) > self.validation_cache_size:
+            self.validated.popitem(last=False)
+        return result
+    
+    def cache_stats(self):
+        return {'hits': self.cache_hits, 'misses': self.cache_misses}
+    
+    @staticmethod
+    def log_cache_stats(stats):
+        total = stats['hits'] + stats['misses']
+        rate = 100.0 * stats['hits'] / total if total else 0.0
+        logging.info(f"Photo validation cache: {stats['hits']} hits, {stats['misses']} misses ({rate:.1f}% hit rate)")
+    
+    @staticmethod
+    def log_embedding_stats(counters):
+        logging.info(f"Photo embedding: {counters['images_placed']} placements, "
+                     f"{counters['images_embedded']} images embedded, "
+                     f"{counters['image_bytes_saved'] / 1024:.1f} KiB saved by embedding identical photos "
+                     f"with different file names once")
+
+
+class PhotoThumbnailCache:
+    """Keeps print-size, compressed copies of student photos in a content-addressed directory."""
+    
+    INDEX_FILE = 'index.json'
+    
+    def __init__(self, cache_dir, dpi=THUMBNAIL_DPI, width=PHOTO_WIDTH, height=PHOTO_HEIGHT):
+        self.cache_dir = cache_dir
+        self.dpi = dpi
+        self.target_px = (
+            max(1, round(width / 72 * dpi)),
+            max(1, round(height / 72 * dpi))
+        )
+        self.index_path = os.path.join(cache_dir, self.INDEX_FILE)
+    
+    def prepare(self, photo_mgr):
+        """Points photo_mgr at thumbnails, building any that are missing or stale."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index = self._load_index()
+        original = dict(index)
+        stats = {'built': 0, 'reused': 0, 'kept': 0}
+        
+        for roll_id, path in list(photo_mgr.photo_cache.items()):
+            photo_mgr.photo_cache[roll_id] = self._resolve(path, index, stats)
+        
+        if photo_mgr.default_img and os.path.exists(photo_mgr.default_img):
+            photo_mgr.default_img = self._resolve(photo_mgr.default_img, index, stats)
+        
+        if index != original:
+            self._save_index(index)
+        
+        logging.info(f"Photo thumbnails at {self.dpi} DPI: {stats['built']} built, "
+                     f"{stats['reused']} reused, {stats['kept']} originals kept")
+    
+    def _resolve(self, path, index, stats):
+        try:
+            source = os.path.abspath(path)
+            st = os.stat(source)
+            entry = index.get(source)
+            target = [*self.target_px, THUMBNAIL_QUALITY]
+            
+            # digest and keep_original depend on the target size too, not just the source file
+            if (not entry or entry['mtime'] != st.st_mtime_ns or entry['size'] != st.st_size
+                    or entry.get('target') != target):
+                entry = {
+                    'mtime': st.st_mtime_ns,
+                    'size': st.st_size,
+                    'target': target,
+                    'digest': self._digest(source)
+                }
+                index[source] = entry
+            
+            if entry.get('keep_original'):
+                stats['kept'] += 1
+                return path
+            
+            thumb_path = os.path.join(self.cache_dir, f"{entry['digest']}.jpg")
+            if os.path.exists(thumb_path):
+                stats['reused'] += 1
+                return thumb_path
+            
+            if self._build(source, thumb_path):
+                stats['built'] += 1
+                return thumb_path
+            
+            entry['keep_original'] = True
+            stats['kept'] += 1
+            return path
+        except Exception as err:
+            logging.warning(f"Could not prepare thumbnail for {path}: {err}")
+            return path
+    
+    def _digest(self, source):
+        digest = hashlib.sha256(f"{self.target_px}:{THUMBNAIL_QUALITY}".encode())
+        with open(source, 'rb') as f:
+            digest.update(f.read())
+        return digest.hexdigest()
+    
+    def _build(self, source, thumb_path):
+        """Writes the thumbnail; returns False when it would not be smaller than the source."""
+        with PILImage.open(source) as img:
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img = img.convert('RGBA')
+                flat = PILImage.new('RGB', img.size, 'white')
+                flat.paste(img, mask=img.getchannel('A'))
+                img = flat
+            elif img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            
+            # Never upscale: the PDF stretches the image to the print box either way
+            if img.size[0] > self.target_px[0] or img.size[1] > self.target_px[1]:
+                img = img.resize(self.target_px, PILImage.LANCZOS)
+            
+            tmp_path = f"{thumb_path}.tmp{os.getpid()}"
+            img.save(tmp_path, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+        
+        if os.path.getsize(tmp_path) >= os.path.getsize(source):
+            os.remove(tmp_path)
+            return False
+        
+        os.replace(tmp_path, thumb_path)
+        return True
+    
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_index(self, index):
+        tmp_path = f"{self.index_path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
 
 
 class StyleManager:
-    """Manages paragraph and text styles."""
+    """Manages paragraph and text styles; each style is built once and shared."""
     
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_title_style():
         return ParagraphStyle(
             'Title',
@@ -113,6 +341,7 @@ class StyleManager:
         )
     
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_header_style():
         return ParagraphStyle(
             'Header',
@@ -124,6 +353,7 @@ class StyleManager:
         )
     
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_name_style():
         return ParagraphStyle(
             'Name',
@@ -134,6 +364,7 @@ class StyleManager:
         )
     
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_roll_style():
         return ParagraphStyle(
             'Roll',
@@ -144,6 +375,7 @@ class StyleManager:
         )
     
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_signature_style():
         return ParagraphStyle(
             'Sign',
@@ -154,6 +386,7 @@ class StyleManager:
         )
     
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_supervisor_header_style():
         return ParagraphStyle(
             'InvigHeader',
@@ -165,6 +398,7 @@ class StyleManager:
         )
     
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_placeholder_style():
         return ParagraphStyle(
             'Placeholder',
@@ -175,16 +409,71 @@ class StyleManager:
         )
 
 
+class CellTable(Table):
+    """A Table that keeps its layout when wrapped again at the same width.
+    
+    Cached student cells are placed in many grids; this skips re-measuring the photo
+    and re-breaking the name lines every time a grid is laid out.
+    """
+    
+    def wrap(self, availWidth, availHeight):
+        if getattr(self, '_wrapped_width', None) != availWidth:
+            Table.wrap(self, availWidth, availHeight)
+            self._wrapped_width = availWidth
+        return self._width, self._height
+
+
+class CellCache:
+    """LRU of per-student cell content keyed by (roll, name, photo digest, layout version).
+    
+    build(roll, name) returns (cell, image), image being the (source path, embedded path) of its
+    photo; the images of every cell handed out since take_images() are kept for record_embedded_images.
+    """
+    
+    def __init__(self, photo_mgr, size=CELL_CACHE_SIZE):
+        self.photo_mgr = photo_mgr
+        self.size = size
+        self.cells = OrderedDict()
+        self.images = []
+    
+    def get(self, roll, name, build):
+        """Returns the cached content for the student, calling build(roll, name) on a miss."""
+        key = (roll, name, self.photo_mgr.get_photo_digest(roll), LAYOUT_VERSION)
+        entry = self.cells.get(key)
+        if entry is not None:
+            self.cells.move_to_end(key)
+            metrics.count('cell_cache_hits')
+        else:
+            metrics.count('cell_cache_misses')
+            entry = self.cells[key] = build(roll, name)
+            if len(self.cells) > self.size:
+                self.cells.popitem(last=False)
+        
+        cell, image = entry
+        self.images.append(image)
+        return cell
+    
+    def take_images(self):
+        images, self.images = self.images, []
+        return images
+
+
 class StudentCellBuilder:
     """Builds individual student cells with photo and info."""
     
-    def __init__(self, photo_mgr):
+    def __init__(self, photo_mgr, cache_size=CELL_CACHE_SIZE):
         self.photo_mgr = photo_mgr
+        self.cache = CellCache(photo_mgr, cache_size)
     
     def build_cell(self, roll, name):
+        """Returns the student's cell, reused while roll, name, photo and layout are unchanged."""
+        return self.cache.get(roll, name, self._build_cell)
+    
+    def _build_cell(self, roll, name):
         photo_path = self.photo_mgr.get_photo_path(roll)
         
         photo_elem = None
+        validated = None
         if photo_path and os.path.exists(photo_path):
             try:
                 validated = self.photo_mgr.validate_photo(photo_path, PHOTO_WIDTH, PHOTO_HEIGHT)
@@ -194,6 +483,7 @@ class StudentCellBuilder:
                     photo_elem = self._build_placeholder()
             except Exception as err:
                 logging.error(f"Error loading image for {roll}: {err}")
+                validated = None
                 photo_elem = self._build_placeholder()
         else:
             photo_elem = self._build_placeholder()
@@ -205,7 +495,7 @@ class StudentCellBuilder:
         info_parts.append(Spacer(1, 1*mm))
         info_parts.append(Paragraph("Sign:______________", StyleManager.get_signature_style()))
         
-        combined = Table(
+        combined = CellTable(
             [[photo_elem, info_parts]],
             colWidths=[PHOTO_WIDTH, None]
         )
@@ -223,7 +513,7 @@ class StudentCellBuilder:
             ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
         ]))
         
-        return combined
+        return combined, (photo_path, validated)
     
     def _build_placeholder(self):
         placeholder = Table(
@@ -248,6 +538,10 @@ class StudentCellBuilder:
 class HeaderBuilder:
     """Builds document headers."""
     
+    @staticmethod
+    def build_title():
+        return [Paragraph("IITP Attendance System", StyleManager.get_title_style())]
+    
     @staticmethod
     def build_first_row(date, day, session, room, count):
         content = f"""<b>Date:</b> {date} ({day}) &nbsp;&nbsp;|&nbsp;&nbsp; <b>Shift:</b> {session} &nbsp;&nbsp;|&nbsp;&nbsp; <b>Room No:</b> {room} &nbsp;&nbsp;|&nbsp;&nbsp; <b>Student count:</b> {count}"""
@@ -378,52 +672,606 @@ class SupervisorSectionBuilder:
         return [header_tbl, Spacer(1, 0), data_tbl]
 
 
+StaticForm = namedtuple('StaticForm', 'name width height space_before space_after fonts code')
+
+
+class StaticFormLibrary:
+    """Static page furniture (title, invigilator table) laid out once per process.
+    
+    The drawing operators are captured from a scratch canvas the first time a piece is
+    needed; each document then gets them as a form XObject it stamps with doForm.
+    The captured operators name fonts by the document's internal names (/F1, /F2), so
+    FONT_ORDER is registered first in the scratch canvas and in every document.
+    
+    Capturing reads two reportlab internals, the canvas' pending operators (c._code) and
+    c._doc.getInternalFontName, so requirements.txt pins reportlab to the series checked here.
+    """
+    
+    FONT_ORDER = ('Helvetica', 'Helvetica-Bold')
+    BLEED = 4           # room outside the box for stroke widths, the form's BBox clips
+    _forms = {}
+    
+    @classmethod
+    def register_fonts(cls, c):
+        """Registers FONT_ORDER with the canvas' document and returns their internal names."""
+        return tuple(c._doc.getInternalFontName(font) for font in cls.FONT_ORDER)
+    
+    @classmethod
+    def capture(cls, key, draw):
+        """Returns the form for key, running draw(canvas) on a scratch canvas the first time.
+        
+        draw returns the form's (width, height, space_before, space_after).
+        """
+        form = cls._forms.get(key)
+        if form is None:
+            c = pdf_canvas.Canvas(io.BytesIO(), pagesize=A4)
+            fonts = cls.register_fonts(c)
+            size = draw(c)
+            form = cls._forms[key] = StaticForm(f"StaticForm{len(cls._forms)}", *size, fonts, '\n'.join(c._code))
+            metrics.count('static_forms_captured')
+        return form
+    
+    @classmethod
+    def capture_flowables(cls, name, build, width):
+        """Form of the flowables from build() stacked top to bottom in a frame of the given width."""
+        def draw(c):
+            flowables = build()
+            sizes = [f.wrap(width, A4[1]) for f in flowables]
+            y = height = sum(h for _, h in sizes)
+            for flowable, (w, h) in zip(flowables, sizes):
+                y -= h
+                flowable.drawOn(c, 0, y, _sW=width - w)
+            return width, height, flowables[0].getSpaceBefore(), flowables[-1].getSpaceAfter()
+        
+        return cls.capture((name, width), draw)
+    
+    @classmethod
+    def stamp(cls, c, form, x=0, y=0):
+        """Draws form with its lower-left corner at (x, y), defining it in this document if needed."""
+        if cls.register_fonts(c) != form.fonts:
+            raise ValueError(f"Fonts were registered before {cls.FONT_ORDER}; static forms would use the wrong fonts")
+        if not c.hasForm(form.name):
+            c.beginForm(form.name, -cls.BLEED, -cls.BLEED, form.width + cls.BLEED, form.height + cls.BLEED)
+            c.addLiteral(form.code)
+            c.endForm()
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(form.name)
+        c.restoreState()
+
+
+class StaticFormFlowable(Flowable):
+    """Platypus flowable that stamps the flowables from build() as a captured static form."""
+    
+    def __init__(self, name, build):
+        super().__init__()
+        self.name = name
+        self.build = build
+        self.form = None
+    
+    def wrap(self, availWidth, availHeight):
+        self.form = StaticFormLibrary.capture_flowables(self.name, self.build, availWidth)
+        self.width, self.height = self.form.width, self.form.height
+        self.spaceBefore, self.spaceAfter = self.form.space_before, self.form.space_after
+        return self.width, self.height
+    
+    def draw(self):
+        StaticFormLibrary.stamp(self.canv, self.form)
+
+
+class BundleOutline:
+    """Outline (bookmark) entries of a session bundle: one per room, with its courses beneath it."""
+    
+    @staticmethod
+    def entries(sheets):
+        """Per sheet, the (key, title, level) entries that point at its first page."""
+        entries = []
+        previous_room = None
+        for i, sheet in enumerate(sheets):
+            marks = []
+            if sheet['room'] != previous_room:
+                marks.append((f"room{i}", f"Room {sheet['room']}", 0))
+                previous_room = sheet['room']
+            marks.append((f"sheet{i}", f"{sheet['course']} ({sheet['count']} students)", 1))
+            entries.append(marks)
+        return entries
+    
+    @staticmethod
+    def mark(c, marks):
+        for key, title, level in marks:
+            c.bookmarkPage(key)
+            c.addOutlineEntry(title, key, level=level)
+        c.showOutline()
+
+
+class OutlineMarker(Flowable):
+    """Zero-size flowable that adds a sheet's outline entries on the page it lands on."""
+    
+    def __init__(self, marks):
+        super().__init__()
+        self.marks = marks
+    
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+    
+    def draw(self):
+        BundleOutline.mark(self.canv, self.marks)
+
+
+_string_width = functools.lru_cache(maxsize=65536)(stringWidth)
+
+
+class CanvasSheetRenderer:
+    """Draws attendance sheets straight onto a canvas instead of through platypus.
+    
+    Reproduces the platypus layout (title, header rows, 3-column grid, invigilator table)
+    from fixed geometry: names wrap to at most NAME_MAX_LINES lines, so every grid row has
+    the same height and rows per page and cell positions are plain arithmetic.
+    The constants mirror the margins, paddings and spacers of the platypus builders.
+    """
+    
+    LEFT = 10*mm
+    WIDTH = A4[0] - 20*mm
+    TOP = A4[1] - 6*mm - 6          # SimpleDocTemplate margin plus the frame's 6pt padding
+    BOTTOM = 6*mm + 6
+    RADIUS = 5
+    LINE_WIDTH = 1.5
+    NBSP = '\xa0\xa0'
+    
+    TITLE_HEIGHT = 24
+    HEADER_HEIGHT = 22
+    COLUMN_WIDTH = WIDTH / COLUMNS_PER_ROW
+    CELL_PADDING = 3
+    PHOTO_PADDING = 2
+    INFO_INDENT = 2*mm
+    INFO_WIDTH = COLUMN_WIDTH - 2 * CELL_PADDING - PHOTO_WIDTH - INFO_INDENT - PHOTO_PADDING
+    CELL_HEIGHT = PHOTO_HEIGHT + 2 * PHOTO_PADDING
+    ROW_HEIGHT = CELL_HEIGHT + 2 * CELL_PADDING
+    NAME_LEADING = 12
+    LINE_LEADING = 11
+    
+    INVIGILATOR_HEADER_HEIGHT = 19
+    INVIGILATOR_ROWS = 11
+    INVIGILATOR_ROW_HEIGHT = 8*mm
+    INVIGILATOR_COLUMNS = [20*mm, 95*mm, 75*mm]
+    INVIGILATOR_HEIGHT = INVIGILATOR_HEADER_HEIGHT + INVIGILATOR_ROWS * INVIGILATOR_ROW_HEIGHT
+    
+    def __init__(self, photo_mgr, cache_size=CELL_CACHE_SIZE):
+        self.photo_mgr = photo_mgr
+        self.cache = CellCache(photo_mgr, cache_size)
+    
+    def render(self, output_path, date, day, session, room, course, students, count):
+        """Writes the sheet and returns its page count."""
+        c = pdf_canvas.Canvas(output_path, pagesize=A4)
+        self.draw_sheet(c, date, day, session, room, course, students, count)
+        pages = c.getPageNumber()
+        c.save()
+        return pages
+    
+    def render_bundle(self, output_path, sheets):
+        """Writes the sheets one after another into one PDF and returns its page count."""
+        c = pdf_canvas.Canvas(output_path, pagesize=A4)
+        for sheet, marks in zip(sheets, BundleOutline.entries(sheets)):
+            BundleOutline.mark(c, marks)
+            self.draw_sheet(c, **sheet)
+            c.showPage()
+        pages = c.getPageNumber() - 1
+        c.save()
+        return pages
+    
+    def draw_sheet(self, c, date, day, session, room, course, students, count):
+        """Draws one sheet starting on the canvas' current (empty) page."""
+        title = StaticFormLibrary.capture('canvas-title', self._draw_title)
+        StaticFormLibrary.stamp(c, title, 0, self.TOP - title.height)
+        c.setLineCap(1)
+        c.setLineJoin(1)
+        c.setLineWidth(self.LINE_WIDTH)
+        
+        sep = f" {self.NBSP}|{self.NBSP} "
+        y = self.TOP - 12 - 6*mm - self.HEADER_HEIGHT
+        self._draw_header(c, y, [
+            ('Date:', f" {date} ({day}){sep}"), ('Shift:', f" {session}{sep}"),
+            ('Room No:', f" {room}{sep}"), ('Student count:', f" {count}"),
+        ])
+        y -= 2*mm + self.HEADER_HEIGHT
+        self._draw_header(c, y, [
+            ('Subject:', f" {course}{sep}"), ('Stud Present:', f" {self.NBSP * 5}| "), ('Stud Absent:', ''),
+        ])
+        y -= 2*mm
+        
+        cells = [self.cache.get(s['Roll Number'], s['Student Name'], self._build_cell) for s in students]
+        rows = [cells[i:i + COLUMNS_PER_ROW] for i in range(0, len(cells), COLUMNS_PER_ROW)]
+        first = True
+        while rows:
+            fit = max(1, int((y - self.BOTTOM) / self.ROW_HEIGHT + 1e-6))
+            page_rows, rows = rows[:fit], rows[fit:]
+            y = self._draw_grid(c, y, page_rows, round_top=first, round_bottom=not rows)
+            first = False
+            if rows:
+                c.showPage()
+                y = self.TOP
+        
+        # The invigilator table moves to a new page rather than split
+        y -= 3*mm
+        if y - self.INVIGILATOR_HEIGHT < self.BOTTOM:
+            c.showPage()
+            y = self.TOP
+        invigilator = StaticFormLibrary.capture('canvas-invigilator', self._draw_invigilator_section)
+        StaticFormLibrary.stamp(c, invigilator, 0, y - invigilator.height)
+    
+    def _build_cell(self, roll, name):
+        path = self.photo_mgr.get_photo_path(roll)
+        photo = None
+        if path and os.path.exists(path):
+            photo = self.photo_mgr.validate_photo(path, PHOTO_WIDTH, PHOTO_HEIGHT)
+        return (roll, photo, self.wrap_name(name)), (path, photo)
+    
+    @classmethod
+    def wrap_name(cls, name, font='Helvetica-Bold', size=10):
+        """Greedy word wrap to the info column; lines past NAME_MAX_LINES are cut with an ellipsis."""
+        space = _string_width(' ', font, size)
+        lines = []
+        current, width = [], 0.0
+        for word in str(name).split():
+            word_width = _string_width(word, font, size)
+            if current and width + space + word_width > cls.INFO_WIDTH:
+                lines.append(' '.join(current))
+                current, width = [], 0.0
+            width += (space if current else 0.0) + word_width
+            current.append(word)
+        if current:
+            lines.append(' '.join(current))
+        
+        if len(lines) > NAME_MAX_LINES:
+            lines = lines[:NAME_MAX_LINES - 1] + [' '.join(lines[NAME_MAX_LINES - 1:])]
+        return [cls._truncate(line, font, size) for line in lines]
+    
+    @classmethod
+    def _truncate(cls, text, font, size):
+        if _string_width(text, font, size) <= cls.INFO_WIDTH:
+            return text
+        limit = cls.INFO_WIDTH - _string_width('...', font, size)
+        width = 0.0
+        for i, char in enumerate(text):
+            width += _string_width(char, font, size)
+            if width > limit:
+                return text[:i].rstrip() + '...'
+        return text
+    
+    def _draw_header(self, c, y, parts):
+        c.roundRect(self.LEFT, y, self.WIDTH, self.HEADER_HEIGHT, self.RADIUS)
+        text = c.beginText(self.LEFT + 5, y + 7)
+        for label, value in parts:
+            text.setFont('Helvetica-Bold', 11)
+            text.textOut(label)
+            text.setFont('Helvetica', 11)
+            text.textOut(value)
+        c.drawText(text)
+    
+    def _draw_grid(self, c, top, rows, round_top, round_bottom):
+        """Draws rows of cells hanging from top and returns the grid's bottom edge."""
+        bottom = top - len(rows) * self.ROW_HEIGHT
+        for r, row in enumerate(rows):
+            y = top - (r + 1) * self.ROW_HEIGHT + self.CELL_PADDING
+            for col, cell in enumerate(row):
+                self._draw_cell(c, self.LEFT + col * self.COLUMN_WIDTH + self.CELL_PADDING, y, *cell)
+        
+        right = self.LEFT + self.WIDTH
+        for r in range(1, len(rows)):
+            c.line(self.LEFT, top - r * self.ROW_HEIGHT, right, top - r * self.ROW_HEIGHT)
+        for col in range(1, COLUMNS_PER_ROW):
+            c.line(self.LEFT + col * self.COLUMN_WIDTH, bottom, self.LEFT + col * self.COLUMN_WIDTH, top)
+        self._draw_outline(c, self.LEFT, bottom, self.WIDTH, top - bottom, round_top, round_bottom)
+        return bottom
+    
+    def _draw_cell(self, c, x, y, roll, photo, name_lines):
+        if photo:
+            c.drawImage(photo, x, y + self.PHOTO_PADDING, PHOTO_WIDTH, PHOTO_HEIGHT, mask='auto')
+        else:
+            self._draw_placeholder(c, x, y + self.PHOTO_PADDING)
+        c.line(x + PHOTO_WIDTH, y, x + PHOTO_WIDTH, y + self.CELL_HEIGHT)
+        
+        # Name lines, 1mm, roll, 1mm, sign: one block centred against the photo
+        block = self.NAME_LEADING * len(name_lines) + 2 * self.LINE_LEADING + 2*mm
+        base = y + self.PHOTO_PADDING + (PHOTO_HEIGHT - block) / 2
+        tx = x + PHOTO_WIDTH + self.INFO_INDENT
+        
+        c.setFont('Helvetica', 9)
+        c.drawString(tx, base + 2, "Sign:______________")
+        
+        text = c.beginText(tx, base + self.LINE_LEADING + 1*mm + 2)
+        text.setFont('Helvetica-Bold', 9)
+        text.textOut("Roll:")
+        text.setFont('Helvetica', 9)
+        text.textOut(f" {roll}")
+        c.drawText(text)
+        
+        c.setFont('Helvetica-Bold', 10)
+        line_y = base + 2 * (self.LINE_LEADING + 1*mm) + self.NAME_LEADING * len(name_lines) - 10
+        for line in name_lines:
+            c.drawString(tx, line_y, line)
+            line_y -= self.NAME_LEADING
+    
+    def _draw_placeholder(self, c, x, y):
+        c.saveState()
+        c.setLineWidth(1)
+        c.setStrokeColor(colors.grey)
+        c.rect(x, y, PHOTO_WIDTH, PHOTO_HEIGHT)
+        c.restoreState()
+        
+        c.setFont('Helvetica', 8)
+        lines = ["📷", "", "No Image", "Available"]
+        line_y = y + (PHOTO_HEIGHT + 10 * len(lines)) / 2 - 8
+        for line in lines:
+            c.drawCentredString(x + PHOTO_WIDTH / 2, line_y, line)
+            line_y -= 10
+    
+    def _draw_title(self, c):
+        c.setFont('Helvetica-Bold', 20)
+        c.drawCentredString(self.LEFT + self.WIDTH / 2, self.TITLE_HEIGHT - 20, "IITP Attendance System")
+        return A4[0], self.TITLE_HEIGHT, 0, 0
+    
+    def _draw_invigilator_section(self, c):
+        """Draws the table with its bottom edge at y=0."""
+        c.setLineCap(1)
+        c.setLineJoin(1)
+        c.setLineWidth(self.LINE_WIDTH)
+        top = self.INVIGILATOR_HEIGHT
+        header_bottom = top - self.INVIGILATOR_HEADER_HEIGHT
+        self._draw_outline(c, self.LEFT, header_bottom, self.WIDTH, self.INVIGILATOR_HEADER_HEIGHT,
+                           round_top=True, round_bottom=False)
+        c.setFont('Helvetica-Bold', 11)
+        c.drawCentredString(self.LEFT + self.WIDTH / 2, header_bottom + 5, "Invigilator Name & Signature")
+        
+        bottom = header_bottom - self.INVIGILATOR_ROWS * self.INVIGILATOR_ROW_HEIGHT
+        edges = [self.LEFT]
+        for width in self.INVIGILATOR_COLUMNS:
+            edges.append(edges[-1] + width)
+        
+        for i, row in enumerate([('Sl No.', 'Name', 'Signature')] + [(str(n), '', '') for n in range(1, 11)]):
+            row_top = header_bottom - i * self.INVIGILATOR_ROW_HEIGHT
+            baseline = row_top - self.INVIGILATOR_ROW_HEIGHT / 2 - 4
+            c.setFont('Helvetica-Bold' if i == 0 else 'Helvetica', 10)
+            c.drawCentredString((edges[0] + edges[1]) / 2, baseline, row[0])
+            c.drawString(edges[1] + 3, baseline, row[1])
+            c.drawString(edges[2] + 3, baseline, row[2])
+            if i:
+                c.line(self.LEFT, row_top, self.LEFT + self.WIDTH, row_top)
+        for edge in edges[1:-1]:
+            c.line(edge, bottom, edge, header_bottom)
+        self._draw_outline(c, self.LEFT, bottom, self.WIDTH, header_bottom - bottom,
+                           round_top=False, round_bottom=True)
+        return A4[0], top, 0, 0
+    
+    def _draw_outline(self, c, x, y, w, h, round_top, round_bottom):
+        """Box with ROUNDEDCORNERS-style corners, rounded only where the table is not split."""
+        top = self.RADIUS if round_top else 0
+        low = self.RADIUS if round_bottom else 0
+        path = c.beginPath()
+        path.moveTo(x + low, y)
+        path.lineTo(x + w - low, y)
+        if low:
+            path.arcTo(x + w - 2 * low, y, x + w, y + 2 * low, startAng=270, extent=90)
+        path.lineTo(x + w, y + h - top)
+        if top:
+            path.arcTo(x + w - 2 * top, y + h - 2 * top, x + w, y + h, startAng=0, extent=90)
+        path.lineTo(x + top, y + h)
+        if top:
+            path.arcTo(x, y + h - 2 * top, x + 2 * top, y + h, startAng=90, extent=90)
+        path.lineTo(x, y + low)
+        if low:
+            path.arcTo(x, y, x + 2 * low, y + 2 * low, startAng=180, extent=90)
+        path.close()
+        c.drawPath(path, stroke=1, fill=0)
+
+
 class AttendanceSheetGenerator:
     """Main class for generating attendance sheets with photographs."""
     
-    def __init__(self, photos_dir=PHOTOS_DIRECTORY, default_img=DEFAULT_PHOTO):
+    def __init__(self, photos_dir=PHOTOS_DIRECTORY, default_img=DEFAULT_PHOTO,
+                 thumbnail_dir=None, thumbnail_dpi=THUMBNAIL_DPI, renderer='platypus'):
         self.photo_mgr = PhotoManager(photos_dir, default_img)
+        if thumbnail_dir:
+            PhotoThumbnailCache(thumbnail_dir, thumbnail_dpi).prepare(self.photo_mgr)
+        self.renderer = renderer
+        self.canvas_renderer = CanvasSheetRenderer(self.photo_mgr) if renderer == 'canvas' else None
         self.cell_builder = StudentCellBuilder(self.photo_mgr)
         self.grid_builder = StudentGridBuilder(self.cell_builder)
+        self.cell_cache = self.canvas_renderer.cache if self.canvas_renderer else self.cell_builder.cache
     
+    @metrics.timed('generate_document')
     def generate_document(self, output_path, date, day, session, room, course, students, count):
         try:
-            doc = SimpleDocTemplate(
-                output_path,
-                pagesize=A4,
-                topMargin=6*mm,
-                bottomMargin=6*mm,
-                leftMargin=10*mm,
-                rightMargin=10*mm
-            )
-            
-            elements = []
-            
-            elements.append(Paragraph("IITP Attendance System", StyleManager.get_title_style()))
-            elements.append(Spacer(1, 4*mm))
-            
-            elements.append(HeaderBuilder.build_first_row(date, day, session, room, count))
-            elements.append(Spacer(1, 2*mm))
-            
-            elements.append(HeaderBuilder.build_second_row(course))
-            elements.append(Spacer(1, 2*mm))
-            
-            grid = self.grid_builder.build_grid(students)
-            if grid:
-                elements.append(grid)
-            
-            elements.append(Spacer(1, 3*mm))
-            
-            supervisor_parts = SupervisorSectionBuilder.build_section()
-            elements.append(KeepTogether(supervisor_parts))
+            self.cell_cache.take_images()
+            with binary_streams():
+                if self.canvas_renderer is not None:
+                    pages = self.canvas_renderer.render(output_path, date, day, session, room, course, students, count)
+                else:
+                    doc = self._create_document(output_path)
+                    doc.build(self._build_sheet(date, day, session, room, course, students, count))
+                    pages = doc.page
             
-            doc.build(elements)
+            self.photo_mgr.record_embedded_images(self.cell_cache.take_images())
+            metrics.count('pdfs_generated')
+            metrics.count('pages_rendered', pages)
+            metrics.count_file(output_path)
             logging.info(f"Generated PDF: {output_path}")
             return True
             
         except Exception as err:
             logging.error(f"Failed to generate PDF {output_path}: {err}", exc_info=True)
             return False
+    
+    @metrics.timed('generate_bundle')
+    def generate_bundle(self, output_path, sheets):
+        """Renders several sheets (generate_document arguments without output_path) into one PDF.
+        
+        Every sheet starts on a new page and gets an outline entry under its room's entry.
+        The file is built in a single pass, so fonts, static forms and photos are embedded once.
+        """
+        try:
+            self.cell_cache.take_images()
+            with binary_streams():
+                if self.canvas_renderer is not None:
+                    pages = self.canvas_renderer.render_bundle(output_path, sheets)
+                else:
+                    elements = []
+                    for sheet, marks in zip(sheets, BundleOutline.entries(sheets)):
+                        if elements:
+                            elements.append(PageBreak())
+                        elements.append(OutlineMarker(marks))
+                        elements.extend(self._build_sheet(**sheet))
+                    doc = self._create_document(output_path)
+                    doc.build(elements)
+                    pages = doc.page
+            
+            self.photo_mgr.record_embedded_images(self.cell_cache.take_images())
+            metrics.count('bundles_generated')
+            metrics.count('pages_rendered', pages)
+            metrics.count_file(output_path)
+            logging.info(f"Generated bundle: {output_path} ({len(sheets)} sheets, {pages} pages)")
+            return True
+            
+        except Exception as err:
+            logging.error(f"Failed to generate bundle {output_path}: {err}", exc_info=True)
+            return False
+    
+    def render_job(self, job):
+        """Renders a batch job: a bundle when it carries 'sheets', otherwise a single sheet."""
+        if 'sheets' in job:
+            return self.generate_bundle(**job)
+        return self.generate_document(**job)
+    
+    @staticmethod
+    def _create_document(output_path):
+        return SimpleDocTemplate(
+            output_path,
+            pagesize=A4,
+            topMargin=6*mm,
+            bottomMargin=6*mm,
+            leftMargin=10*mm,
+            rightMargin=10*mm
+        )
+    
+    def _build_sheet(self, date, day, session, room, course, students, count):
+        elements = []
+        
+        elements.append(StaticFormFlowable('title', HeaderBuilder.build_title))
+        elements.append(Spacer(1, 4*mm))
+        
+        elements.append(HeaderBuilder.build_first_row(date, day, session, room, count))
+        elements.append(Spacer(1, 2*mm))
+        
+        elements.append(HeaderBuilder.build_second_row(course))
+        elements.append(Spacer(1, 2*mm))
+        
+        grid = self.grid_builder.build_grid(students)
+        if grid:
+            elements.append(grid)
+        
+        elements.append(Spacer(1, 3*mm))
+        
+        # One flowable, so it moves to a new page rather than split
+        elements.append(StaticFormFlowable('invigilator', SupervisorSectionBuilder.build_section))
+        return elements
+
+
+def estimate_page_count(student_count):
+    """Estimates rendered pages; the first page also carries the headers and invigilator table."""
+    overflow = max(0, student_count - FIRST_PAGE_STUDENTS)
+    return 1 + -(-overflow // STUDENTS_PER_PAGE)
+
+
+def estimate_job_pages(job):
+    """estimate_page_count for a batch job, summed over the sheets of a bundle."""
+    if 'sheets' in job:
+        return sum(estimate_page_count(sheet['count']) for sheet in job['sheets'])
+    return estimate_page_count(job['count'])
+
+
+_worker_generator = None
+
+
+def _init_render_worker(photos_dir, default_img, thumbnail_dir, thumbnail_dpi, renderer, profile_dir=None):
+    global _worker_generator
+    if profile_dir:
+        metrics.enable_profiling(profile_dir, clear=False)
+    _worker_generator = AttendanceSheetGenerator(photos_dir, default_img, thumbnail_dir, thumbnail_dpi, renderer)
+
+
+def _render_job(job):
+    metrics.reset()
+    success = _worker_generator.render_job(job)
+    return success, os.getpid(), _worker_generator.photo_mgr.cache_stats(), metrics.export()
+
+
+class AttendanceBatchRenderer:
+    """Renders many attendance sheets across a pool of worker processes."""
+    
+    def __init__(self, photos_dir=PHOTOS_DIRECTORY, default_img=DEFAULT_PHOTO, workers=None,
+                 thumbnail_dir=None, thumbnail_dpi=THUMBNAIL_DPI, renderer='platypus'):
+        self.photos_dir = photos_dir
+        self.default_img = default_img
+        self.workers = workers or os.cpu_count() or 1
+        self.thumbnail_dir = thumbnail_dir
+        self.thumbnail_dpi = thumbnail_dpi
+        self.renderer = renderer
+        self.photo_stats = {'hits': 0, 'misses': 0}
+    
+    def render(self, jobs):
+        """Renders jobs (generate_document/generate_bundle keyword arguments); returns (created, failed) in job order."""
+        if not jobs:
+            return [], []
+        
+        # Longest documents first keeps the pool evenly loaded towards the end of the batch
+        order = sorted(range(len(jobs)), key=lambda i: estimate_job_pages(jobs[i]), reverse=True)
+        results = [False] * len(jobs)
+        worker_stats = {}
+        workers = min(self.workers, len(jobs))
+        
+        logging.info(f"Rendering {len(jobs)} attendance sheets across {workers} worker processes")
+        
+        if self.thumbnail_dir:
+            # Build thumbnails once up front so workers only ever read the cache
+            PhotoThumbnailCache(self.thumbnail_dir, self.thumbnail_dpi).prepare(
+                PhotoManager(self.photos_dir, self.default_img)
+            )
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_render_worker,
+            initargs=(self.photos_dir, self.default_img, self.thumbnail_dir, self.thumbnail_dpi, self.renderer,
+                      metrics.profiler.directory if metrics.profiler else None)
+        ) as pool:
+            futures = {pool.submit(_render_job, jobs[i]): i for i in order}
+            for future in as_completed(futures):
+                pos = futures[future]
+                try:
+                    results[pos], pid, stats, job_metrics = future.result()
+                    worker_stats[pid] = stats
+                    metrics.merge(job_metrics)
+                except Exception as err:
+                    logging.error(f"Error rendering {jobs[pos]['output_path']}: {err}")
+        
+        created = []
+        failed = []
+        for job, success in zip(jobs, results):
+            if success:
+                created.append(job['output_path'])
+            else:
+                failed.append(os.path.basename(job['output_path']))
+                logging.error(f"Failed to generate PDF: {os.path.basename(job['output_path'])}")
+        
+        logging.info(f"  ✓ Successfully generated: {len(created)} PDFs")
+        if failed:
+            logging.error(f"  ✗ Failed to generate: {len(failed)} PDFs")
+        
+        # Counters are cumulative per worker, so the latest report from each pid is its total
+        self.photo_stats = {
+            key: sum(stats[key] for stats in worker_stats.values()) for key in ('hits', 'misses')
+        }
+        
+        return created, failed
 
 
 def generate_attendance_sheets(assignments, date_obj, date_str, day, session, 
@@ -1,16 +1,41 @@
+import numpy as np
 import pandas as pd
 import os
+import re
 import sys
 import logging
+import shutil
+import json
+import hashlib
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
 from collections import defaultdict
 from datetime import datetime
-from document_creator import AttendanceSheetGenerator, generate_attendance_sheets
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from instrumentation import metrics, PROFILE_DIRECTORY_NAME
+from document_creator import (
+    AttendanceSheetGenerator, AttendanceBatchRenderer, PhotoManager, generate_attendance_sheets,
+    PDF_RENDERERS, THUMBNAIL_DPI, LAYOUT_VERSION as PDF_LAYOUT_VERSION
+)
 
 INPUT_FILE_PATH = 'input/input_data_tt.xlsx'
 OUTPUT_DIRECTORY = 'output'
 PHOTOS_DIRECTORY = 'photos'
 LOG_FILE_PATH = os.path.join(OUTPUT_DIRECTORY, 'error.log')
+PLAN_FILE_NAME = 'allocation_plan.json'
+MANIFEST_FILE_NAME = 'artifact_manifest.json'
+EXCEL_LAYOUT_VERSION = 1
+CACHE_DIRECTORY = 'cache'
+WORKBOOK_CACHE_VERSION = 1
+WORKBOOK_CACHE_MAX_BYTES = 512 * 1024 * 1024
+ALLOCATION_CACHE_VERSION = 2
+ALLOCATION_CACHE_MAX_BYTES = 64 * 1024 * 1024
 MIN_ALLOCATION_SIZE = 3
+OPTIMAL_TIME_BUDGET = 2.0
+OPTIMAL_BRANCH_WIDTH = 3
 
 
 class SystemLogger:
@@ -31,15 +56,192 @@ class SystemLogger:
         )
 
 
+class WorkbookCache:
+    """Stores parsed input sheets on disk, keyed by the workbook's content hash."""
+    
+    SHEET_NAMES = ['in_timetable', 'in_course_roll_mapping', 'in_roll_name_mapping', 'in_room_capacity']
+    
+    def __init__(self, cache_dir=None, max_bytes=WORKBOOK_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIRECTORY, 'workbooks')
+        self.max_bytes = max_bytes
+    
+    @staticmethod
+    def compute_hash(file_path):
+        digest = hashlib.sha256(f"v{WORKBOOK_CACHE_VERSION}".encode())
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def load(self, key):
+        entry_dir = os.path.join(self.cache_dir, key)
+        paths = [os.path.join(entry_dir, f"{name}.pkl") for name in self.SHEET_NAMES]
+        if not all(os.path.exists(path) for path in paths):
+            return None
+        
+        try:
+            frames = tuple(pd.read_pickle(path) for path in paths)
+        except Exception as err:
+            logging.warning(f"Discarding unreadable workbook cache entry {key}: {err}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        
+        os.utime(entry_dir)
+        return frames
+    
+    def store(self, key, frames):
+        entry_dir = os.path.join(self.cache_dir, key)
+        tmp_dir = f"{entry_dir}.tmp{os.getpid()}"
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            for name, frame in zip(self.SHEET_NAMES, frames):
+                frame.to_pickle(os.path.join(tmp_dir, f"{name}.pkl"))
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except Exception as err:
+            logging.warning(f"Could not write workbook cache entry {key}: {err}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        
+        self.evict(keep=key)
+    
+    def evict(self, keep=None):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(entry_dir) or '.tmp' in name:
+                continue
+            # Parallel workers share the cache, so another one may evict the entry first
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir)
+                )
+                entries.append((os.path.getmtime(entry_dir), name, size))
+            except FileNotFoundError:
+                continue
+            total += size
+        
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            total -= size
+            logging.info(f"Evicted workbook cache entry {name}")
+
+
+class AllocationCache:
+    """Stores each session's room allocation on disk, keyed by a digest of its inputs."""
+    
+    def __init__(self, cache_dir=None, max_bytes=ALLOCATION_CACHE_MAX_BYTES, rebuild=False):
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIRECTORY, 'allocations')
+        self.max_bytes = max_bytes
+        self.rebuild = rebuild
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def compute_key(course_digests, registry, strategy, allocator='greedy', options=None):
+        """course_digests: (course, roll-list digest) pairs in timetable order."""
+        rooms = [(r.room_id, r.capacity, r.block, r.floor) for r in registry.rooms]
+        payload = json.dumps(
+            [ALLOCATION_CACHE_VERSION, MIN_ALLOCATION_SIZE, strategy, registry.buffer,
+             allocator, options or {}, course_digests, rooms],
+            default=str, separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def load(self, key):
+        if self.rebuild:
+            self.misses += 1
+            return None
+        
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as err:
+            logging.warning(f"Discarding unreadable allocation cache entry {key}: {err}")
+            self.misses += 1
+            return None
+        
+        os.utime(path)
+        self.hits += 1
+        return entry
+    
+    def store(self, key, entry):
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        # Serialized up front so an entry that is not JSON-safe fails the session rather than the cache
+        data = json.dumps(entry, separators=(',', ':'))
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            logging.warning(f"Could not write allocation cache entry {key}: {err}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        
+        self.evict(keep=key)
+    
+    def evict(self, keep=None):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not name.endswith('.json'):
+                continue
+            # Parallel workers share the cache, so another one may evict the entry first
+            try:
+                size = os.path.getsize(path)
+                entries.append((os.path.getmtime(path), name, size))
+            except FileNotFoundError:
+                continue
+            total += size
+        
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == f"{keep}.json":
+                continue
+            total -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            logging.info(f"Evicted allocation cache entry {name}")
+
+
 class DataLoader:
     """Manages loading and validation of input data."""
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, use_cache=True, cache=None):
         self.file_path = file_path
+        self.use_cache = use_cache
+        self.cache = cache or WorkbookCache()
         
+    @metrics.timed('load_workbook')
     def load_all_sheets(self):
         try:
             logging.info(f"Loading data from {self.file_path}")
+            
+            cache_key = None
+            if self.use_cache:
+                cache_key = WorkbookCache.compute_hash(self.file_path)
+                cached = self.cache.load(cache_key)
+                if cached is not None:
+                    logging.info(f"Reusing parsed workbook from cache ({cache_key[:12]})")
+                    self._log_counts(*cached)
+                    return cached
+            
             wb = pd.ExcelFile(self.file_path)
             
             timetable = pd.read_excel(wb, 'in_timetable')
@@ -48,10 +250,10 @@ class DataLoader:
             room_data = pd.read_excel(wb, 'in_room_capacity', usecols=['Room No.', 'Exam Capacity', 'Block'])
             
             logging.info("All data sheets loaded successfully.")
-            logging.info(f"Loaded {len(timetable)} timetable entries")
-            logging.info(f"Loaded {len(course_mapping)} course enrollments")
-            logging.info(f"Loaded {len(student_info)} student name mappings")
-            logging.info(f"Loaded {len(room_data)} rooms")
+            self._log_counts(timetable, course_mapping, student_info, room_data)
+            
+            if cache_key:
+                self.cache.store(cache_key, (timetable, course_mapping, student_info, room_data))
             
             return timetable, course_mapping, student_info, room_data
         except FileNotFoundError:
@@ -60,6 +262,13 @@ class DataLoader:
         except Exception as err:
             logging.error(f"Error loading data: {err}")
             sys.exit(1)
+    
+    @staticmethod
+    def _log_counts(timetable, course_mapping, student_info, room_data):
+        logging.info(f"Loaded {len(timetable)} timetable entries")
+        logging.info(f"Loaded {len(course_mapping)} course enrollments")
+        logging.info(f"Loaded {len(student_info)} student name mappings")
+        logging.info(f"Loaded {len(room_data)} rooms")
 
 
 class CourseParser:
@@ -80,6 +289,85 @@ class CourseParser:
         return courses
 
 
+class StudentRegistry:
+    """Interns every roll number to a compact integer ID; IDs follow sorted roll order."""
+    
+    MISSING = object()
+    
+    def __init__(self, students, enrollments):
+        students = students.dropna(subset=['Roll'])
+        # tolist() turns numpy scalars into Python values, which output and JSON need
+        rolls = pd.concat([students['Roll'], enrollments['rollno']]).dropna().unique().tolist()
+        
+        self.rolls = np.array(sorted(rolls, key=self.sort_key), dtype=object)
+        self.ids = {roll: sid for sid, roll in enumerate(self.rolls)}
+        
+        named = students.drop_duplicates('Roll', keep='last')
+        self.names = np.full(len(self.rolls), self.MISSING, dtype=object)
+        self.names[self.encode(named['Roll'])] = named['Name'].to_numpy(dtype=object)
+        
+        logging.info(f"Registered {len(self.rolls)} roll numbers ({len(named)} with names)")
+    
+    @staticmethod
+    def sort_key(roll):
+        """Numeric rolls (pandas reads all-digit ones as ints) sort by value, before text rolls."""
+        return (1, roll) if isinstance(roll, str) else (0, roll)
+    
+    def encode(self, rolls):
+        """Maps a Series of roll numbers to IDs; unknown rolls become -1."""
+        return rolls.map(self.ids).fillna(-1).to_numpy(dtype=np.int32)
+    
+    def decode(self, ids):
+        """Turns an ID array back into roll numbers; only used where output is produced."""
+        return self.rolls[ids].tolist()
+    
+    def get_name(self, roll, default=None):
+        sid = self.ids.get(roll)
+        if sid is None or self.names[sid] is self.MISSING:
+            return default
+        return self.names[sid]
+    
+    def __len__(self):
+        return len(self.rolls)
+
+
+class CourseRollIndex:
+    """Pre-built lookup from course code to its sorted student IDs."""
+    
+    EMPTY = np.empty(0, dtype=np.int32)
+    
+    def __init__(self, enrollments, registry):
+        self.rolls = {}
+        self.counts = {}
+        self.digests = {}
+        
+        frame = pd.DataFrame({
+            'course_code': enrollments['course_code'].to_numpy(),
+            'sid': registry.encode(enrollments['rollno'])
+        })
+        frame = frame[frame['sid'] >= 0]
+        
+        for course, ids in frame.groupby('course_code', sort=False)['sid']:
+            # IDs are assigned in roll order, so sorting IDs sorts the rolls
+            self.rolls[course] = np.sort(ids.to_numpy())
+            self.counts[course] = len(self.rolls[course])
+            self.digests[course] = hashlib.sha1(
+                '\n'.join(map(str, registry.decode(self.rolls[course]))).encode()
+            ).hexdigest()
+        
+        logging.info(f"Indexed {len(self.rolls)} courses from {len(enrollments)} enrollments")
+    
+    def get_rolls(self, course):
+        return self.rolls.get(course, self.EMPTY)
+    
+    def get_count(self, course):
+        return self.counts.get(course, 0)
+    
+    def get_digest(self, course):
+        """Hash of the course's roll strings, stable when other courses gain or lose students."""
+        return self.digests.get(course)
+
+
 class FloorCalculator:
     """Calculates floor levels from room identifiers."""
     
@@ -100,20 +388,88 @@ class FloorCalculator:
         return abs(floor1 - floor2)
 
 
+class RoomRecord:
+    """A single exam room with its derived floor and effective capacity."""
+    
+    __slots__ = ('index', 'room_id', 'capacity', 'block', 'floor', 'effective_capacity')
+    
+    def __init__(self, index, room_id, capacity, block, buffer):
+        self.index = index
+        self.room_id = room_id
+        self.capacity = capacity
+        self.block = block
+        self.floor = FloorCalculator.get_floor(room_id)
+        self.effective_capacity = capacity - buffer
+
+
+class RoomRegistry:
+    """Room table built once per run, with constant-time lookup by room number."""
+    
+    def __init__(self, room_data, buffer):
+        self.buffer = buffer
+        self.rooms = []
+        self.by_id = {}
+        self.records_by_id = defaultdict(list)
+        self.buildings = {}
+        
+        for row in room_data.to_dict('records'):
+            room = RoomRecord(len(self.rooms), row['Room No.'], row['Exam Capacity'], row['Block'], buffer)
+            self.rooms.append(room)
+            self.by_id.setdefault(room.room_id, room)
+            self.records_by_id[room.room_id].append(room)
+            self.buildings.setdefault(room.block, []).append(room)
+        
+        self.total_effective_capacity = sum(r.effective_capacity for r in self.rooms)
+        
+        # Fill orders depend only on static room data, so they are sorted once per run
+        self.building_order = {
+            block: self._proximity_order(rooms) for block, rooms in self.buildings.items()
+        }
+        self.capacity_order = sorted(
+            self.rooms,
+            key=lambda r: (-r.effective_capacity, r.block, r.floor)
+        )
+    
+    @staticmethod
+    def _proximity_order(rooms):
+        ordered = sorted(rooms, key=lambda r: (-r.effective_capacity, r.floor))
+        if ordered:
+            ref_floor = ordered[0].floor
+            ordered = sorted(
+                ordered,
+                key=lambda r: (FloorCalculator.calculate_distance(r.floor, ref_floor), -r.effective_capacity)
+            )
+        return ordered
+    
+    def get(self, room_id):
+        return self.by_id.get(room_id)
+    
+    def __iter__(self):
+        return iter(self.rooms)
+    
+    def __len__(self):
+        return len(self.rooms)
+
+
 class RoomAllocator:
     """Manages room allocation with building and floor proximity optimization."""
     
-    def __init__(self, rooms, strategy, buffer):
-        self.rooms = rooms
+    def __init__(self, registry, strategy, quiet=False):
+        self.registry = registry
+        self.rooms = registry.rooms
         self.strategy = strategy
-        self.buffer = buffer
+        self.buffer = registry.buffer
+        self.quiet = quiet
         
-        self.usage = {r['Room No.']: 0 for r in rooms}
+        self.usage = {r.room_id: 0 for r in self.rooms}
         self.course_tracker = {}
+        self.allocated_courses = set()
         
-        for room in self.rooms:
-            room['Floor'] = FloorCalculator.get_floor(room['Room No.'])
-            room['effective_capacity'] = room['Exam Capacity'] - buffer
+        # Seats each building can still offer a course that has none allocated yet
+        self.building_available = {
+            block: sum(self._fresh_capacity(r) for r in rooms)
+            for block, rooms in registry.buildings.items()
+        }
     
     def get_available_capacity(self, room_id, course, max_cap):
         current = self.usage[room_id]
@@ -131,137 +487,142 @@ class RoomAllocator:
         
         return max(0, available)
     
+    def _fresh_capacity(self, room):
+        return self.get_available_capacity(room.room_id, None, room.effective_capacity)
+    
     def register_allocation(self, room_id, course, count):
+        records = self.registry.records_by_id[room_id]
+        before = [self._fresh_capacity(r) for r in records]
+        
         self.usage[room_id] += count
         if self.strategy == 'sparse':
             key = (room_id, course)
             self.course_tracker[key] = self.course_tracker.get(key, 0) + count
+        
+        for room, old in zip(records, before):
+            self.building_available[room.block] += self._fresh_capacity(room) - old
     
+    def _log(self, level, message):
+        """Logs per-course progress unless this allocator is a quiet probe."""
+        if not self.quiet:
+            logging.log(level, message)
+    
+    def get_building_capacity(self, building, course):
+        if self.strategy == 'sparse' and course in self.allocated_courses:
+            # Per-course limits already consumed, so the running totals do not apply
+            return sum(
+                self.get_available_capacity(r.room_id, course, r.effective_capacity)
+                for r in self.registry.buildings[building]
+            )
+        return self.building_available[building]
+    
+    def allocate_session(self, courses):
+        """Allocates (course, students) pairs in order; returns (course, allocations) pairs."""
+        return [(course, self.allocate_course(course, students)) for course, students in courses]
+    
+    @metrics.timed('allocate_course')
     def allocate_course(self, course, students):
         total = len(students)
-        logging.info(f"Allocating course {course} with {total} students...")
-        
-        buildings = defaultdict(list)
-        for room in self.rooms:
-            buildings[room['Block']].append(room)
+        self._log(logging.INFO, f"Allocating course {course} with {total} students...")
         
         allocations = []
-        remaining = list(students)
+        offset = 0
         
         best_building = None
         max_capacity = 0
         
-        for building, building_rooms in buildings.items():
-            available = sum(
-                self.get_available_capacity(r['Room No.'], course, r['effective_capacity'])
-                for r in building_rooms
-            )
+        for building in self.registry.buildings:
+            available = self.get_building_capacity(building, course)
             if available >= total:
                 best_building = building
-                logging.info(f"  Allocating course {course} entirely in building {building}")
+                self._log(logging.INFO, f"  Allocating course {course} entirely in building {building}")
                 break
             elif available > max_capacity:
                 max_capacity = available
                 best_building = building
         
+        self.allocated_courses.add(course)
+        
         if best_building:
-            building_rooms = buildings[best_building]
-            sorted_rooms = sorted(
-                building_rooms,
-                key=lambda r: (-r['effective_capacity'], r['Floor'])
-            )
-            
-            if sorted_rooms:
-                ref_floor = sorted_rooms[0]['Floor']
-                sorted_rooms = sorted(
-                    sorted_rooms,
-                    key=lambda r: (FloorCalculator.calculate_distance(r['Floor'], ref_floor), -r['effective_capacity'])
-                )
-            
-            remaining = self._assign_to_rooms(
-                course, remaining, sorted_rooms, allocations, best_building
+            sorted_rooms = self.registry.building_order[best_building]
+            offset = self._assign_to_rooms(
+                course, students, offset, sorted_rooms, allocations, best_building
             )
         
-        if remaining:
-            logging.warning(f"  Course {course} requires multiple buildings")
-            other_rooms = [r for r in self.rooms if r['Block'] != best_building]
-            sorted_other = sorted(
-                other_rooms,
-                key=lambda r: (-r['effective_capacity'], r['Block'], r['Floor'])
-            )
-            remaining = self._assign_to_rooms(
-                course, remaining, sorted_other, allocations, "multiple"
+        if offset < total:
+            self._log(logging.WARNING, f"  Course {course} requires multiple buildings")
+            sorted_other = [r for r in self.registry.capacity_order if r.block != best_building]
+            offset = self._assign_to_rooms(
+                course, students, offset, sorted_other, allocations, "multiple"
             )
         
-        if remaining:
-            logging.error(f"  Failed to allocate {len(remaining)} students for course {course}")
+        if offset < total:
+            self._log(logging.ERROR, f"  Failed to allocate {total - offset} students for course {course}")
         
         return allocations
     
-    def _assign_to_rooms(self, course, students, rooms, allocations, building):
-        remaining = list(students)
+    def _assign_to_rooms(self, course, students, offset, rooms, allocations, building):
+        """Seats students[offset:] in rooms; allocations hold views of students. Returns the new offset."""
+        total = len(students)
         
         for room in rooms:
-            if not remaining:
+            if offset >= total:
                 break
             
-            room_id = room['Room No.']
-            max_cap = room['effective_capacity']
-            floor = room['Floor']
+            room_id = room.room_id
+            max_cap = room.effective_capacity
+            floor = room.floor
             
             available = self.get_available_capacity(room_id, course, max_cap)
             
             if available > 0:
-                assign_count = min(len(remaining), available)
+                assign_count = min(total - offset, available)
                 
-                if assign_count < MIN_ALLOCATION_SIZE and len(remaining) > assign_count:
+                if assign_count < MIN_ALLOCATION_SIZE and total - offset > assign_count:
                     continue
                 
-                assigned = remaining[:assign_count]
-                remaining = remaining[assign_count:]
-                
                 allocations.append({
                     'room': room,
-                    'students': assigned
+                    'students': students[offset:offset + assign_count]
                 })
+                offset += assign_count
                 
                 self.register_allocation(room_id, course, assign_count)
                 
-                logging.info(f"    Allocated {assign_count} students to {room_id} "
-                           f"(Floor {floor}, Building {room['Block']}, "
-                           f"Used: {self.usage[room_id]}/{max_cap})")
+                self._log(logging.INFO, f"    Allocated {assign_count} students to {room_id} "
+                                        f"(Floor {floor}, Building {room.block}, "
+                                        f"Used: {self.usage[room_id]}/{max_cap})")
         
-        if remaining:
+        if offset < total:
             for room in rooms:
-                if not remaining:
+                if offset >= total:
                     break
                 
-                room_id = room['Room No.']
-                max_cap = room['effective_capacity']
+                room_id = room.room_id
+                max_cap = room.effective_capacity
                 available = self.get_available_capacity(room_id, course, max_cap)
                 
                 if available > 0:
-                    assign_count = min(len(remaining), available)
-                    assigned = remaining[:assign_count]
-                    remaining = remaining[assign_count:]
+                    assign_count = min(total - offset, available)
                     
                     allocations.append({
                         'room': room,
-                        'students': assigned
+                        'students': students[offset:offset + assign_count]
                     })
+                    offset += assign_count
                     
                     self.register_allocation(room_id, course, assign_count)
                     
-                    logging.info(f"    Allocated {assign_count} students to {room_id} (forced allocation)")
+                    self._log(logging.INFO, f"    Allocated {assign_count} students to {room_id} (forced allocation)")
         
-        return remaining
+        return offset
     
     def check_capacity_violations(self):
         violations = []
         for room_id, used in self.usage.items():
-            room = next((r for r in self.rooms if r['Room No.'] == room_id), None)
+            room = self.registry.get(room_id)
             if room:
-                max_eff = room['effective_capacity']
+                max_eff = room.effective_capacity
                 if used > max_eff:
                     msg = (f"CAPACITY EXCEEDED: Room {room_id} has {used} students "
                            f"but effective capacity is {max_eff}")
@@ -270,74 +631,388 @@ class RoomAllocator:
         return violations
 
 
+class OptimalRoomAllocator(RoomAllocator):
+    """Searches a whole session for the fewest rooms, then buildings per course, then floor spread.
+    
+    Branch-and-bound over a handful of candidate placements per course (one per floor window of
+    each building, plus a spill across buildings), seeded with the greedy allocation. When the
+    time budget runs out the best allocation found so far is kept, so it is never worse than greedy.
+    """
+    
+    def __init__(self, registry, strategy, time_budget=OPTIMAL_TIME_BUDGET, branch_width=OPTIMAL_BRANCH_WIDTH):
+        super().__init__(registry, strategy)
+        self.time_budget = time_budget
+        self.branch_width = branch_width
+        self.unique_rooms = [r for r in registry.rooms if registry.by_id[r.room_id] is r]
+        self.nodes = 0
+        self.timed_out = False
+    
+    @staticmethod
+    def allocation_cost(results):
+        """(rooms used, buildings summed over courses, floor spread summed over courses)."""
+        rooms = set()
+        buildings = 0
+        spread = 0
+        for _, allocations in results:
+            placed = [a['room'] for a in allocations if len(a['students'])]
+            rooms.update(r.room_id for r in placed)
+            cost = OptimalRoomAllocator._placement_cost([(r, 1) for r in placed], set())
+            buildings += cost[1]
+            spread += cost[2]
+        return (len(rooms), buildings, spread)
+    
+    @staticmethod
+    def _placement_cost(placement, opened):
+        floors = defaultdict(list)
+        for room, _ in placement:
+            floors[room.block].append(room.floor)
+        new_rooms = len({room.room_id for room, _ in placement} - opened)
+        spread = sum(FloorCalculator.calculate_distance(min(f), max(f)) for f in floors.values())
+        return (new_rooms, len(floors), spread)
+    
+    def _course_limit(self, room, free):
+        limit = room.effective_capacity
+        if self.strategy == 'sparse':
+            limit = int(limit * 0.5)
+        return max(0, min(limit, free[room.room_id]))
+    
+    def _fill(self, count, rooms, free, opened):
+        """Seats count students: open rooms first, then the fewest new rooms (best fit for the tail)."""
+        placement = []
+        remaining = count
+        
+        def take(room, seats):
+            nonlocal remaining
+            assign = min(seats, remaining)
+            if assign < MIN_ALLOCATION_SIZE and remaining > assign:
+                return
+            placement.append((room, assign))
+            remaining -= assign
+        
+        open_rooms = [(r, self._course_limit(r, free)) for r in rooms if r.room_id in opened]
+        for room, seats in sorted(open_rooms, key=lambda x: -x[1]):
+            if not remaining:
+                break
+            if seats > 0:
+                take(room, seats)
+        
+        new_rooms = [(r, self._course_limit(r, free)) for r in rooms if r.room_id not in opened]
+        new_rooms = [x for x in new_rooms if x[1] > 0]
+        while remaining and new_rooms:
+            fitting = [x for x in new_rooms if x[1] >= remaining]
+            pick = min(fitting, key=lambda x: x[1]) if fitting else max(new_rooms, key=lambda x: x[1])
+            new_rooms.remove(pick)
+            take(*pick)
+        
+        return placement, remaining
+    
+    def _candidates(self, count, free, opened):
+        if count == 0:
+            return [([], (0, 0, 0))]
+        
+        found = {}
+        
+        def add(placement):
+            key = frozenset((room.room_id, seats) for room, seats in placement)
+            if key not in found:
+                found[key] = (placement, self._placement_cost(placement, opened))
+        
+        for block, records in self.registry.buildings.items():
+            rooms = [r for r in records if self.registry.by_id[r.room_id] is r]
+            floors = sorted({r.floor for r in rooms})
+            for i, low in enumerate(floors):
+                for high in floors[i:]:
+                    window = [r for r in rooms if low <= r.floor <= high]
+                    placement, left = self._fill(count, window, free, opened)
+                    if not left:
+                        add(placement)
+                        break
+            
+            placement, left = self._fill(count, rooms, free, opened)
+            if left:
+                others = [r for r in self.registry.capacity_order
+                          if r.block != block and self.registry.by_id[r.room_id] is r]
+                spill, left = self._fill(left, others, free, opened)
+                if not left:
+                    add(placement + spill)
+        
+        ranked = sorted(found.values(), key=lambda c: c[1])
+        return ranked[:self.branch_width]
+    
+    def _search(self, counts, incumbent):
+        best = {'cost': incumbent, 'placements': None}
+        free = {r.room_id: r.effective_capacity for r in self.unique_rooms}
+        opened = set()
+        chosen = []
+        max_room = max((r.effective_capacity for r in self.unique_rooms), default=0)
+        courses_left = [sum(1 for c in counts[i:] if c) for i in range(len(counts) + 1)]
+        students_left = [sum(counts[i:]) for i in range(len(counts) + 1)]
+        deadline = time.perf_counter() + self.time_budget
+        
+        def visit(i, cost):
+            self.nodes += 1
+            if time.perf_counter() > deadline:
+                self.timed_out = True
+                return
+            if i == len(counts):
+                if cost < best['cost']:
+                    best['cost'] = cost
+                    best['placements'] = list(chosen)
+                return
+            
+            overflow = students_left[i] - sum(free[room_id] for room_id in opened)
+            new_rooms = -(-overflow // max_room) if overflow > 0 and max_room > 0 else 0
+            bound = (cost[0] + new_rooms, cost[1] + courses_left[i], cost[2])
+            if bound >= best['cost']:
+                return
+            
+            for placement, step in self._candidates(counts[i], free, opened):
+                added = {room.room_id for room, _ in placement} - opened
+                for room, seats in placement:
+                    free[room.room_id] -= seats
+                opened.update(added)
+                chosen.append(placement)
+                
+                visit(i + 1, tuple(a + b for a, b in zip(cost, step)))
+                
+                chosen.pop()
+                opened.difference_update(added)
+                for room, seats in placement:
+                    free[room.room_id] += seats
+                if self.timed_out:
+                    return
+        
+        visit(0, (0, 0, 0))
+        return best
+    
+    def allocate_session(self, courses):
+        greedy = RoomAllocator(self.registry, self.strategy, quiet=True).allocate_session(courses)
+        
+        placed = sum(len(a['students']) for _, allocations in greedy for a in allocations)
+        complete = placed == sum(len(students) for _, students in courses)
+        greedy_cost = self.allocation_cost(greedy) if complete else (float('inf'),)
+        
+        start = time.perf_counter()
+        best = self._search([len(students) for _, students in courses], greedy_cost)
+        elapsed = time.perf_counter() - start
+        status = "time budget reached" if self.timed_out else "search complete"
+        
+        if best['placements'] is None:
+            logging.info(f"Optimal allocator: keeping greedy allocation {greedy_cost} "
+                         f"({self.nodes} nodes, {elapsed:.2f}s, {status})")
+            return super().allocate_session(courses)
+        
+        logging.info(f"Optimal allocator: rooms/buildings/floor spread {best['cost']} vs greedy {greedy_cost} "
+                     f"({self.nodes} nodes, {elapsed:.2f}s, {status})")
+        
+        results = []
+        for (course, students), placement in zip(courses, best['placements']):
+            logging.info(f"Allocating course {course} with {len(students)} students...")
+            self.allocated_courses.add(course)
+            allocations = []
+            offset = 0
+            for room, seats in sorted(placement, key=lambda p: p[0].index):
+                allocations.append({'room': room, 'students': students[offset:offset + seats]})
+                offset += seats
+                self.register_allocation(room.room_id, course, seats)
+                logging.info(f"    Allocated {seats} students to {room.room_id} "
+                             f"(Floor {room.floor}, Building {room.block}, "
+                             f"Used: {self.usage[room.room_id]}/{room.effective_capacity})")
+            results.append((course, allocations))
+        return results
+
+
+ALLOCATORS = {'greedy': RoomAllocator, 'optimal': OptimalRoomAllocator}
+
+
 class ConflictDetector:
     """Detects scheduling conflicts for students."""
     
+    SESSIONS = ['Morning', 'Evening']
+    
     @staticmethod
-    def check_conflicts(course_enrollments, date, session):
-        student_courses = defaultdict(list)
-        
-        for course, student_ids in course_enrollments.items():
-            for sid in student_ids:
-                student_courses[sid].append(course)
-        
-        has_conflict = False
-        for sid, courses in student_courses.items():
-            if len(courses) > 1:
-                if not has_conflict:
-                    logging.error(f"\n⚠️  CLASH DETECTED ⚠️")
-                    logging.error(f"Date: {date}")
-                    logging.error(f"Session: {session}")
-                logging.error(f"Student {sid} enrolled in: {', '.join(courses)}")
-                has_conflict = True
-        
-        if not has_conflict:
+    @metrics.timed('clash_detection')
+    def find_clashes(timetable, enrollments):
+        """Finds every student sitting two exams in one session, in a single pass over the timetable."""
+        slots = timetable.dropna(subset=['Date']).melt(
+            id_vars=['Date'], value_vars=ConflictDetector.SESSIONS,
+            var_name='Session', value_name='course_code'
+        ).sort_values('Date', kind='stable')
+        # An empty frame maps to float64, which would select columns rather than rows
+        is_exam = slots['course_code'].map(
+            lambda v: isinstance(v, str) and v.strip().upper() != 'NO EXAM'
+        ).astype(bool)
+        # An all-empty column melts to float64, which has no .str accessor
+        slots = slots[is_exam].astype({'course_code': object})
+        slots = slots.assign(course_code=slots['course_code'].str.split(';')).explode('course_code')
+        slots['course_code'] = slots['course_code'].str.strip()
+        slots = slots[slots['course_code'] != ''].drop_duplicates()
+        slots['slot'] = slots.groupby(['Date', 'Session'], sort=False).ngroup()
+        
+        # Rolls become integer codes so the duplicate search runs on one int64 key
+        roll_codes, roll_values = pd.factorize(enrollments['rollno'])
+        seats = slots.merge(
+            pd.DataFrame({'course_code': enrollments['course_code'].to_numpy(), 'roll': roll_codes}),
+            on='course_code'
+        )
+        key = seats['slot'].to_numpy(dtype='int64') * max(len(roll_values), 1) + seats['roll'].to_numpy()
+        seats = seats[pd.Series(key).duplicated(keep=False).to_numpy()]
+        seats = seats.assign(rollno=roll_values.take(seats['roll'].to_numpy()))
+        
+        clashes = seats.groupby(['Date', 'Session', 'rollno'], sort=False)['course_code'].agg(list).reset_index()
+        clashes['Date'] = clashes['Date'].dt.strftime('%d-%m-%Y')
+        return clashes.rename(columns={'rollno': 'Roll Number', 'course_code': 'Courses'})
+    
+    @staticmethod
+    def group_by_session(clashes):
+        by_session = defaultdict(list)
+        for date, session, sid, courses in clashes.itertuples(index=False):
+            by_session[(date, session)].append((sid, courses))
+        return dict(by_session)
+    
+    @staticmethod
+    def check_conflicts(session_clashes, date, session):
+        """Logs the clashes found for one session and returns whether there were any."""
+        if not session_clashes:
             logging.info("✓ No clashes detected")
+            return False
         
-        return has_conflict
+        logging.error(f"\n⚠️  CLASH DETECTED ⚠️")
+        logging.error(f"Date: {date}")
+        logging.error(f"Session: {session}")
+        for sid, courses in session_clashes:
+            logging.error(f"Student {sid} enrolled in: {', '.join(courses)}")
+        return True
+
+
+class RoomSheetWriter:
+    """Streams the fixed room-sheet layout into write-only worksheets."""
+    
+    COLUMNS = ['Roll Number', 'Student Name', 'Signature']
+    COLUMN_WIDTHS = {'A': 15, 'B': 30, 'C': 20}
+    SIGNATORY_ROWS = 5
+    
+    _thin = Side(style='thin')
+    HEADER_FONT = Font(bold=True)
+    HEADER_BORDER = Border(left=_thin, right=_thin, top=_thin, bottom=_thin)
+    HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+    
+    @classmethod
+    def write_workbook(cls, path, course, room, date, session, students):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Sheet1')
+        cls.write_sheet(ws, course, room, date, session, students)
+        wb.save(path)
+    
+    @classmethod
+    def write_sheet(cls, ws, course, room, date, session, students):
+        for col, width in cls.COLUMN_WIDTHS.items():
+            ws.column_dimensions[col].width = width
+        ws.merged_cells.add('A1:C1')
+        
+        ws.append([f'Course: {course} | Room: {room} | Date: {date} | Session: {session}'])
+        ws.append([])
+        ws.append([cls._header_cell(ws, name) for name in cls.COLUMNS])
+        
+        for student in students:
+            ws.append([cls._blank_if_missing(student[name]) for name in cls.COLUMNS])
+        
+        for _ in range(2):
+            ws.append([])
+        for i in range(cls.SIGNATORY_ROWS):
+            ws.append([f"TA {i+1}:"])
+        
+        ws.append([])
+        for i in range(cls.SIGNATORY_ROWS):
+            ws.append([f"Invigilator {i+1}:"])
+    
+    @staticmethod
+    def _blank_if_missing(value):
+        return None if pd.isna(value) else value
+    
+    @classmethod
+    def _header_cell(cls, ws, value):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = cls.HEADER_FONT
+        cell.border = cls.HEADER_BORDER
+        cell.alignment = cls.HEADER_ALIGNMENT
+        return cell
+
+
+class SessionWorkbookWriter:
+    """Writes every room sheet of a session into one streamed workbook with an index sheet."""
+    
+    INDEX_SHEET = 'Index'
+    MAX_SHEET_NAME = 31
+    INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\']")
+    
+    @classmethod
+    def sheet_names(cls, sheets):
+        """Returns Excel-safe, case-insensitively unique names for (course, room) pairs."""
+        used = {cls.INDEX_SHEET.lower()}
+        names = []
+        for course, room in sheets:
+            base = cls.INVALID_SHEET_CHARS.sub('-', f"{course}_{room}").strip() or 'Sheet'
+            name = base[:cls.MAX_SHEET_NAME]
+            suffix = 2
+            while name.lower() in used:
+                tag = f"~{suffix}"
+                name = base[:cls.MAX_SHEET_NAME - len(tag)] + tag
+                suffix += 1
+            used.add(name.lower())
+            names.append(name)
+        return names
+    
+    @classmethod
+    @metrics.timed('write_session_workbook')
+    def write(cls, path, date, session, sheets):
+        """sheets is a list of (course, room, student_records) in the order they should appear."""
+        names = cls.sheet_names([(course, room) for course, room, _ in sheets])
+        
+        wb = Workbook(write_only=True)
+        index = wb.create_sheet(cls.INDEX_SHEET)
+        index.column_dimensions['A'].width = 34
+        index.column_dimensions['B'].width = 15
+        index.column_dimensions['C'].width = 15
+        index.column_dimensions['D'].width = 12
+        index.append([f'Date: {date} | Session: {session} | Sheets: {len(sheets)}'])
+        index.append([])
+        index.append([RoomSheetWriter._header_cell(index, h) for h in ['Sheet', 'Course', 'Room', 'Students']])
+        
+        for name, (course, room, students) in zip(names, sheets):
+            link = f'=HYPERLINK("#\'{name}\'!A1","{name}")'
+            index.append([link, course, room, len(students)])
+            
+            ws = wb.create_sheet(name)
+            RoomSheetWriter.write_sheet(ws, course, room, date, session, students)
+        
+        wb.save(path)
+        metrics.count('excel_files_written')
+        metrics.count_file(path)
 
 
 class DocumentGenerator:
     """Generates Excel and PDF documents for seating arrangements."""
     
     @staticmethod
+    @metrics.timed('create_excel_sheet')
     def create_excel_sheet(path, course, room, date, session, students):
-        df = pd.DataFrame(students)
-        
-        with pd.ExcelWriter(path, engine='openpyxl') as writer:
-            header = f'Course: {course} | Room: {room} | Date: {date} | Session: {session}'
-            header_df = pd.DataFrame([header])
-            header_df.to_excel(writer, index=False, header=False, startrow=0)
-            
-            ws = writer.sheets['Sheet1']
-            ws.merge_cells('A1:C1')
-            
-            df.to_excel(writer, sheet_name='Sheet1', index=False, startrow=2)
-            
-            ws.column_dimensions['A'].width = 15
-            ws.column_dimensions['B'].width = 30
-            ws.column_dimensions['C'].width = 20
-            
-            last_row = len(df) + 4
-            
-            last_row += 2
-            for i in range(5):
-                ws[f'A{last_row + i}'] = f"TA {i+1}:"
-            
-            last_row += 6
-            for i in range(5):
-                ws[f'A{last_row + i}'] = f"Invigilator {i+1}:"
+        RoomSheetWriter.write_workbook(path, course, room, date, session, students)
+        metrics.count('excel_files_written')
+        metrics.count_file(path)
 
 
 class ReportGenerator:
     """Generates summary reports."""
     
     @staticmethod
+    @metrics.timed('generate_reports')
     def generate_reports(seating_data, capacity_data, room_specs):
         if seating_data:
             df = pd.DataFrame(seating_data)
             path = os.path.join(OUTPUT_DIRECTORY, 'op_overall_seating_arrangement.xlsx')
             df.to_excel(path, index=False)
+            metrics.count_file(path)
         else:
             logging.warning("No seating arrangements to write")
         
@@ -345,36 +1020,292 @@ class ReportGenerator:
             df = pd.DataFrame(capacity_data)
             path = os.path.join(OUTPUT_DIRECTORY, 'op_seats_left.xlsx')
             df.to_excel(path, index=False)
+            metrics.count_file(path)
             logging.info(f"✓ Generated seats left report: {path}")
         else:
             logging.warning("No seats left data to write")
+    
+    @staticmethod
+    def generate_clash_report(clashes):
+        report = clashes.assign(
+            Courses=clashes['Courses'].str.join(', '),
+            **{'Course Count': clashes['Courses'].str.len()}
+        )
+        path = os.path.join(OUTPUT_DIRECTORY, 'op_clash_report.xlsx')
+        os.makedirs(OUTPUT_DIRECTORY, exist_ok=True)
+        report.to_excel(path, index=False)
+        metrics.count_file(path)
+        logging.info(f"✓ Generated clash report ({len(report)} clashes): {path}")
+
+
+class AllocationPlan:
+    """Reads and writes the machine-readable allocation plan."""
+    
+    VERSION = 1
+    
+    @staticmethod
+    def session_key(session_plan):
+        date = datetime.strptime(session_plan['date'], '%Y-%m-%d').strftime('%d-%m-%Y')
+        return f"{date}:{session_plan['session']}"
+    
+    @staticmethod
+    def save(path, sessions, strategy, buffer, input_file=INPUT_FILE_PATH):
+        plan = {
+            'version': AllocationPlan.VERSION,
+            'input_file': input_file,
+            'strategy': strategy,
+            'buffer': buffer,
+            'sessions': sessions
+        }
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(plan, f, separators=(',', ':'))
+        logging.info(f"✓ Wrote allocation plan for {len(sessions)} sessions: {path}")
+    
+    @staticmethod
+    def load(path):
+        with open(path) as f:
+            plan = json.load(f)
+        if plan.get('version') != AllocationPlan.VERSION:
+            raise ValueError(f"Unsupported plan version {plan.get('version')} in {path}")
+        return plan
+    
+    @staticmethod
+    def select_sessions(plan, selectors):
+        """Filters plan sessions by 'DD-MM-YYYY' or 'DD-MM-YYYY:Session' selectors."""
+        if not selectors:
+            return plan['sessions']
+        
+        wanted = {s.strip().lower() for s in selectors}
+        selected = []
+        for session_plan in plan['sessions']:
+            key = AllocationPlan.session_key(session_plan)
+            if key.lower() in wanted or key.split(':')[0] in wanted:
+                selected.append(session_plan)
+        
+        logging.info(f"Selected {len(selected)} of {len(plan['sessions'])} planned sessions")
+        return selected
+
+
+class ArtifactManifest:
+    """Maps each generated artifact to a hash of its inputs so unchanged files are not rebuilt."""
+    
+    def __init__(self, output_dir, enabled=True):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+        self.enabled = enabled
+        self.previous = self._load()
+        self.reset()
+    
+    def reset(self):
+        self.current = {}
+        self.reused = 0
+        self.rebuilt = 0
+    
+    @staticmethod
+    def digest(*parts):
+        payload = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _key(self, path):
+        return os.path.relpath(path, self.output_dir)
+    
+    def is_fresh(self, path, kind, digest):
+        """True (and recorded as reused) when path exists and was built from the same inputs."""
+        key = self._key(path)
+        entry = self.previous.get(key)
+        if self.enabled and entry and entry['digest'] == digest and os.path.exists(path):
+            self.current[key] = entry
+            self.reused += 1
+            return True
+        return False
+    
+    def record_built(self, path, kind, digest):
+        self.current[self._key(path)] = {'kind': kind, 'digest': digest}
+        self.rebuilt += 1
+    
+    def merge(self, current, reused, rebuilt):
+        self.current.update(current)
+        self.reused += reused
+        self.rebuilt += rebuilt
+    
+    def export(self):
+        return self.current, self.reused, self.rebuilt
+    
+    def finish(self, active_kinds, prune=True):
+        """Deletes stale artifacts of the kinds produced this run and saves the manifest."""
+        entries = dict(self.current)
+        removed = 0
+        
+        for key, entry in self.previous.items():
+            if key in entries:
+                continue
+            if not prune or entry['kind'] not in active_kinds:
+                entries[key] = entry
+                continue
+            stale_path = os.path.join(self.output_dir, key)
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+                removed += 1
+        
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        
+        logging.info(f"Artifacts: {self.rebuilt} rebuilt, {self.reused} reused, {removed} stale removed")
+    
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
 
 
 class ExamScheduler:
     """Main orchestrator for exam scheduling."""
     
-    def __init__(self, timetable, enrollments, students, rooms, strategy, buffer, gen_docs=True):
+    def __init__(self, timetable, enrollments, students, rooms, strategy, buffer, gen_docs=True, workers=1, pdf_workers=1,
+                 thumbnail_dpi=THUMBNAIL_DPI, plan_only=False, excel_output='room', force_render=False,
+                 rebuild=False, allocator='greedy', allocator_budget=OPTIMAL_TIME_BUDGET, pdf_renderer='platypus',
+                 attendance_output='file'):
         self.timetable = timetable
         self.enrollments = enrollments
         self.students = students
         self.rooms = rooms
         self.strategy = strategy
         self.buffer = buffer
-        self.gen_docs = gen_docs
+        self.plan_only = plan_only
+        self.excel_output = excel_output
+        self.allocator = allocator
+        self.allocator_options = {'time_budget': allocator_budget} if allocator == 'optimal' else {}
+        self.gen_docs = gen_docs and not plan_only
+        self.workers = workers
+        self.pdf_workers = pdf_workers
+        self.thumbnail_dpi = thumbnail_dpi
+        self.thumbnail_dir = os.path.join(CACHE_DIRECTORY, 'thumbnails') if thumbnail_dpi else None
+        self.pdf_renderer = pdf_renderer
+        self.attendance_output = attendance_output
         
-        self.name_lookup = {}
-        for _, row in students.iterrows():
-            self.name_lookup[row['Roll']] = row['Name']
+        self.student_registry = StudentRegistry(students, enrollments)
+        self.course_index = CourseRollIndex(enrollments, self.student_registry)
+        self.room_registry = RoomRegistry(rooms, buffer)
+        self.allocation_cache = AllocationCache(rebuild=rebuild)
+        self.session_clashes = {}
         
         self.doc_builder = None
-        if gen_docs:
-            self.doc_builder = AttendanceSheetGenerator(PHOTOS_DIRECTORY)
+        if self.gen_docs and pdf_workers <= 1:
+            self.doc_builder = AttendanceSheetGenerator(
+                PHOTOS_DIRECTORY, thumbnail_dir=self.thumbnail_dir, thumbnail_dpi=thumbnail_dpi,
+                renderer=pdf_renderer
+            )
+        # Digests come from the source photos, not thumbnails, so they match across render modes
+        self.photo_mgr = PhotoManager(PHOTOS_DIRECTORY) if self.gen_docs else None
+        
+        self.manifest = ArtifactManifest(OUTPUT_DIRECTORY, enabled=not force_render)
         
         self.all_seating = []
         self.all_capacity = []
         self.generated_pdfs = []
+        self.pdf_jobs = []
+        self.pdf_job_digests = []
+        self.session_plans = []
+        self.photo_stats = {'hits': 0, 'misses': 0}
     
-    def process_all_dates(self):
+    def process_all_dates(self, plan_path=None):
+        clashes = ConflictDetector.find_clashes(self.timetable, self.enrollments)
+        self.session_clashes = ConflictDetector.group_by_session(clashes)
+        ReportGenerator.generate_clash_report(clashes)
+        
+        tasks = self._collect_session_tasks()
+        
+        if self.workers > 1 and len(tasks) > 1:
+            self._process_parallel(tasks)
+        else:
+            for task in tasks:
+                self._run_session_task(task)
+        
+        if self.plan_only:
+            AllocationPlan.save(
+                plan_path or os.path.join(OUTPUT_DIRECTORY, PLAN_FILE_NAME),
+                self.session_plans, self.strategy, self.buffer
+            )
+        
+        self._finish_run(track_artifacts=not self.plan_only)
+        return self.generated_pdfs
+    
+    def render_plan(self, plan, selectors=None):
+        """Renders Excel/PDF artifacts for the selected sessions of a saved plan."""
+        selected = AllocationPlan.select_sessions(plan, selectors)
+        
+        # Reports always cover the whole plan; only the documents are limited to the selection
+        for session_plan in plan['sessions']:
+            self._record_plan(session_plan)
+        
+        for session_plan in selected:
+            try:
+                self._render_plan(session_plan)
+            except Exception as err:
+                logging.error(f"Error rendering {AllocationPlan.session_key(session_plan)}: {err}", exc_info=True)
+        
+        self._finish_run(prune_artifacts=not selectors)
+        return self.generated_pdfs
+    
+    def _finish_run(self, track_artifacts=True, prune_artifacts=True):
+        if self.pdf_jobs:
+            renderer = AttendanceBatchRenderer(
+                PHOTOS_DIRECTORY, workers=self.pdf_workers,
+                thumbnail_dir=self.thumbnail_dir, thumbnail_dpi=self.thumbnail_dpi, renderer=self.pdf_renderer
+            )
+            with metrics.stage('render_pdf_batch'):
+                created, _ = renderer.render(self.pdf_jobs)
+            self.generated_pdfs.extend(created)
+            self._merge_photo_stats(renderer.photo_stats)
+            
+            created_paths = set(created)
+            for job, digest in zip(self.pdf_jobs, self.pdf_job_digests):
+                if job['output_path'] in created_paths:
+                    self.manifest.record_built(job['output_path'], 'pdf', digest)
+        
+        if track_artifacts:
+            active_kinds = {'excel', 'pdf'} if self.gen_docs else {'excel'}
+            self.manifest.finish(active_kinds, prune=prune_artifacts)
+        
+        if self.doc_builder:
+            self._merge_photo_stats(self.doc_builder.photo_mgr.cache_stats())
+        
+        ReportGenerator.generate_reports(self.all_seating, self.all_capacity, self.rooms)
+        
+        cache = self.allocation_cache
+        if cache.hits or cache.misses:
+            logging.info(f"Session allocations: {cache.hits} reused from cache, {cache.misses} computed")
+        
+        if self.gen_docs:
+            logging.info(f"Total PDFs generated: {len(self.generated_pdfs)}")
+            PhotoManager.log_cache_stats(self.photo_stats)
+            PhotoManager.log_embedding_stats(metrics.counters)
+        
+        metrics.count('artifacts_reused', self.manifest.reused)
+        metrics.count('artifacts_rebuilt', self.manifest.rebuilt)
+        metrics.count('allocation_cache_hits', cache.hits)
+        metrics.write(OUTPUT_DIRECTORY, {
+            'strategy': self.strategy,
+            'buffer': self.buffer,
+            'allocator': self.allocator,
+            'workers': self.workers,
+            'pdf_workers': self.pdf_workers,
+            'excel_output': self.excel_output,
+            'attendance_output': self.attendance_output,
+            'plan_only': self.plan_only,
+            'pdfs': self.gen_docs,
+        })
+    
+    def _collect_session_tasks(self):
+        tasks = []
         for idx, row in self.timetable.iterrows():
             try:
                 exam_date = row['Date']
@@ -384,57 +1315,125 @@ class ExamScheduler:
                 date_str = exam_date.strftime('%d-%m-%Y')
                 day = row['Day']
                 
-                logging.info(f"\n{'='*80}")
-                logging.info(f"Processing Date: {date_str} ({day})")
-                logging.info(f"{'='*80}")
-                
                 for session in ['Morning', 'Evening']:
-                    self._process_session(exam_date, date_str, day, session, row)
+                    tasks.append((idx, exam_date, date_str, day, session, row))
                     
             except Exception as err:
                 logging.error(f"Error processing row {idx}: {err}", exc_info=True)
                 continue
+        return tasks
+    
+    def _run_session_task(self, task):
+        idx, exam_date, date_str, day, session, row = task
+        try:
+            if session == 'Morning':
+                logging.info(f"\n{'='*80}")
+                logging.info(f"Processing Date: {date_str} ({day})")
+                logging.info(f"{'='*80}")
+            
+            plan = self._plan_session(exam_date, date_str, day, session, row)
+            if plan is None:
+                return
+            
+            self.session_plans.append(plan)
+            self._record_plan(plan)
+            if not self.plan_only:
+                self._render_plan(plan)
+        except Exception as err:
+            logging.error(f"Error processing row {idx} ({session}): {err}", exc_info=True)
+    
+    def _process_parallel(self, tasks):
+        workers = min(self.workers, len(tasks))
+        logging.info(f"Processing {len(tasks)} sessions across {workers} worker processes")
+        worker_photo_stats = {}
         
-        ReportGenerator.generate_reports(self.all_seating, self.all_capacity, self.rooms)
-        
-        if self.gen_docs:
-            logging.info(f"Total PDFs generated: {len(self.generated_pdfs)}")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_session_worker,
+            initargs=(self, OUTPUT_DIRECTORY, PHOTOS_DIRECTORY,
+                      metrics.profiler.directory if metrics.profiler else None)
+        ) as pool:
+            # map() yields in submission order, so the merged reports follow the timetable
+            for result in pool.map(_run_session_in_worker, tasks):
+                self.all_seating.extend(result['seating'])
+                self.all_capacity.extend(result['capacity'])
+                self.generated_pdfs.extend(result['pdfs'])
+                self.pdf_jobs.extend(result['pdf_jobs'])
+                self.pdf_job_digests.extend(result['pdf_job_digests'])
+                self.session_plans.extend(result['plans'])
+                self.manifest.merge(*result['manifest'])
+                self.allocation_cache.hits += result['allocation_cache'][0]
+                self.allocation_cache.misses += result['allocation_cache'][1]
+                metrics.merge(result['metrics'])
+                if result['photo_stats']:
+                    worker_photo_stats[result['pid']] = result['photo_stats']
         
-        return self.generated_pdfs
+        for stats in worker_photo_stats.values():
+            self._merge_photo_stats(stats)
+    
+    def _merge_photo_stats(self, stats):
+        for key in self.photo_stats:
+            self.photo_stats[key] += stats[key]
     
-    def _process_session(self, exam_date, date_str, day, session, schedule_row):
+    @metrics.timed('plan_session')
+    def _plan_session(self, exam_date, date_str, day, session, schedule_row):
         logging.info(f"\n--- {session} Session ---")
         
         courses = CourseParser.extract_courses(schedule_row[session])
         if not courses:
             logging.info(f"No exams scheduled for {session} session. Skipping.")
-            return
+            return None
         
         logging.info(f"Subjects scheduled: {', '.join(courses)}")
         
         course_students = {}
         for course in courses:
-            enrolled = self.enrollments[self.enrollments['course_code'] == course]['rollno'].tolist()
-            course_students[course] = sorted(enrolled)
-            logging.info(f"  {course}: {len(enrolled)} students enrolled")
+            course_students[course] = self.course_index.get_rolls(course)
+            logging.info(f"  {course}: {self.course_index.get_count(course)} students enrolled")
         
-        if ConflictDetector.check_conflicts(course_students, date_str, session):
+        cache_key = AllocationCache.compute_key(
+            [(course, self.course_index.get_digest(course)) for course in course_students],
+            self.room_registry, self.strategy, self.allocator, self.allocator_options
+        )
+        entry = self.allocation_cache.load(cache_key)
+        if entry is None:
+            entry = self._allocate_session(course_students, date_str, session)
+            self.allocation_cache.store(cache_key, entry)
+        else:
+            logging.info(f"Reusing cached allocation ({cache_key[:12]})")
+            if entry['rooms'] is None:
+                logging.warning(f"Skipping allocation for {date_str} {session}: {entry['reason']}")
+        
+        rooms = entry['rooms']
+        if rooms is None:
+            return None
+        
+        return {
+            'date': exam_date.strftime('%Y-%m-%d'),
+            'day': day,
+            'session': session,
+            'rooms': rooms
+        }
+    
+    def _allocate_session(self, course_students, date_str, session):
+        """Applies the clash flag and runs allocation for one session; the result is JSON-serialisable."""
+        clashes = self.session_clashes.get((date_str, session), [])
+        if ConflictDetector.check_conflicts(clashes, date_str, session):
             logging.warning(f"Skipping allocation for {date_str} {session} due to clashes.")
-            return
+            return {'rooms': None, 'reason': "student clashes"}
         
         total_students = sum(len(s) for s in course_students.values())
         logging.info(f"Total students to allocate: {total_students}")
         
-        room_records = self.rooms.to_dict('records')
-        allocator = RoomAllocator(room_records, self.strategy, self.buffer)
+        allocator = ALLOCATORS[self.allocator](self.room_registry, self.strategy, **self.allocator_options)
         
-        total_capacity = sum(r['effective_capacity'] for r in allocator.rooms)
+        total_capacity = self.room_registry.total_effective_capacity
         logging.info(f"Total effective capacity available: {total_capacity}")
         
         if total_students > total_capacity:
             logging.error(f"INSUFFICIENT CAPACITY: Need {total_students} seats, "
                         f"but only {total_capacity} available")
-            return
+            return {'rooms': None, 'reason': "insufficient capacity"}
         
         sorted_courses = sorted(
             course_students.items(),
@@ -444,46 +1443,93 @@ class ExamScheduler:
         
         room_assignments = defaultdict(lambda: defaultdict(list))
         
-        for course, enrolled in sorted_courses:
-            result = allocator.allocate_course(course, enrolled)
-            
+        for course, result in allocator.allocate_session(sorted_courses):
             for assignment in result:
-                room = assignment['room']
-                students = assignment['students']
-                room_id = room['Room No.']
-                
-                for sid in students:
-                    room_assignments[room_id][course].append(sid)
+                room_assignments[assignment['room'].room_id][course].append(assignment['students'])
         
         violations = allocator.check_capacity_violations()
         if violations:
             logging.error("Capacity violations detected! Skipping output generation.")
-            return
+            return {'rooms': None, 'reason': "capacity violations"}
         
-        self._generate_outputs(
-            exam_date, date_str, day, session, room_assignments,
-            allocator
-        )
+        rooms = []
+        for room_id, course_map in room_assignments.items():
+            room_info = self.room_registry.get(room_id)
+            rooms.append({
+                'room': room_id,
+                'block': room_info.block if room_info else '',
+                'capacity': room_info.capacity if room_info else 0,
+                'allotted': allocator.usage[room_id],
+                'courses': [
+                    {'course': course, 'rolls': self.student_registry.decode(np.sort(np.concatenate(chunks)))}
+                    for course, chunks in course_map.items()
+                ]
+            })
+        
+        return {'rooms': rooms}
     
-    def _generate_outputs(self, exam_date, date_str, day, session, assignments, allocator):
+    def _record_plan(self, plan):
+        folder_date = datetime.strptime(plan['date'], '%Y-%m-%d').strftime('%d_%m_%Y')
+        metrics.count('sessions_allocated')
+        metrics.count('rooms_touched', len(plan['rooms']))
+        metrics.count('students_allocated', sum(len(e['rolls']) for r in plan['rooms'] for e in r['courses']))
+        
+        for room in plan['rooms']:
+            for entry in room['courses']:
+                self.all_seating.append({
+                    'Date': folder_date,
+                    'Day': plan['day'],
+                    'Session': plan['session'],
+                    'Course Code': entry['course'],
+                    'Room': room['room'],
+                    'Building': room['block'],
+                    'Room Capacity': room['capacity'],
+                    'Allocated Student Count': len(entry['rolls']),
+                    'Roll Number List': ';'.join(map(str, entry['rolls']))
+                })
+        
+        for room in plan['rooms']:
+            self.all_capacity.append({
+                'Date': folder_date,
+                'Day': plan['day'],
+                'Session': plan['session'],
+                'Room No.': room['room'],
+                'Exam Capacity': room['capacity'],
+                'Block': room['block'],
+                'Allotted': room['allotted'],
+                'Vacant': room['capacity'] - room['allotted']
+            })
+    
+    @metrics.timed('render_session')
+    def _render_plan(self, plan):
+        exam_date = datetime.strptime(plan['date'], '%Y-%m-%d')
+        day = plan['day']
+        session = plan['session']
         folder_date = exam_date.strftime('%d_%m_%Y')
-        readable_date = exam_date.strftime('%d-%m-%Y')
-        output_path = os.path.join(OUTPUT_DIRECTORY, readable_date, session)
+        date_str = exam_date.strftime('%d-%m-%Y')
+        if self.excel_output == 'session':
+            output_path = os.path.join(OUTPUT_DIRECTORY, date_str)
+        else:
+            output_path = os.path.join(OUTPUT_DIRECTORY, date_str, session)
         os.makedirs(output_path, exist_ok=True)
         
         logging.info(f"\nGenerating output files in: {output_path}")
         
-        used_rooms = set()
+        docs_folder = os.path.join(OUTPUT_DIRECTORY, 'attendance')
+        if self.gen_docs:
+            os.makedirs(docs_folder, exist_ok=True)
         
-        for room_id, course_map in assignments.items():
-            used_rooms.add(room_id)
-            
-            room_info = next((r for r in allocator.rooms if r['Room No.'] == room_id), None)
+        session_sheets = []
+        bundle_sheets = []
+        bundle_photos = []
+        for room in plan['rooms']:
+            room_id = room['room']
             
-            for course, student_ids in course_map.items():
+            for entry in room['courses']:
+                course = entry['course']
                 student_records = []
-                for sid in sorted(student_ids):
-                    name = self.name_lookup.get(sid, "(name not found)")
+                for sid in entry['rolls']:
+                    name = self.student_registry.get_name(sid, "(name not found)")
                     if name == "(name not found)":
                         logging.warning(f"Roll number {sid} not found in name mapping")
                     student_records.append({
@@ -492,73 +1538,268 @@ class ExamScheduler:
                         'Signature': ''
                     })
                 
-                excel_name = f"{folder_date}_{course}_{room_id}.xlsx"
-                excel_path = os.path.join(output_path, excel_name)
-                DocumentGenerator.create_excel_sheet(excel_path, course, room_id, date_str, session, student_records)
+                if self.excel_output == 'session':
+                    session_sheets.append((course, room_id, student_records))
+                else:
+                    excel_name = f"{folder_date}_{course}_{room_id}.xlsx"
+                    excel_path = os.path.join(output_path, excel_name)
+                    digest = ArtifactManifest.digest(
+                        'excel', EXCEL_LAYOUT_VERSION, course, room_id, date_str, session, student_records
+                    )
+                    if not self.manifest.is_fresh(excel_path, 'excel', digest):
+                        DocumentGenerator.create_excel_sheet(excel_path, course, room_id, date_str, session, student_records)
+                        self.manifest.record_built(excel_path, 'excel', digest)
                 
-                if self.doc_builder:
-                    try:
-                        pdf_name = f"{exam_date.strftime('%Y_%m_%d')}_{session.lower()}_{room_id}_{course}.pdf"
-                        docs_folder = os.path.join(OUTPUT_DIRECTORY, 'attendance')
-                        os.makedirs(docs_folder, exist_ok=True)
-                        pdf_path = os.path.join(docs_folder, pdf_name)
-                        success = self.doc_builder.generate_document(
-                            output_path=pdf_path,
-                            date=date_str,
-                            day=day,
-                            session=session,
-                            room=room_id,
-                            course=course,
-                            students=student_records,
-                            count=len(student_records)
-                        )
-                        
-                        if success and self.generated_pdfs is not None:
-                            self.generated_pdfs.append(pdf_path)
-                            
-                    except Exception as err:
-                        logging.error(f"Failed to generate PDF for {course} in {room_id}: {err}")
-                
-                self.all_seating.append({
-                    'Date': folder_date,
-                    'Day': day,
-                    'Session': session,
-                    'Course Code': course,
-                    'Room': room_id,
-                    'Building': room_info['Block'] if room_info else '',
-                    'Room Capacity': room_info['Exam Capacity'] if room_info else 0,
-                    'Allocated Student Count': len(student_ids),
-                    'Roll Number List': ';'.join(map(str, sorted(student_ids)))
-                })
+                if self.gen_docs:
+                    sheet = {
+                        'date': date_str,
+                        'day': day,
+                        'session': session,
+                        'room': room_id,
+                        'course': course,
+                        'students': student_records,
+                        'count': len(student_records)
+                    }
+                    photo_digests = [self.photo_mgr.get_photo_digest(sid) for sid in entry['rolls']]
+                    bundle_sheets.append(sheet)
+                    bundle_photos.append(photo_digests)
+                    
+                    if self.attendance_output != 'bundle':
+                        try:
+                            pdf_name = f"{exam_date.strftime('%Y_%m_%d')}_{session.lower()}_{room_id}_{course}.pdf"
+                            pdf_path = os.path.join(docs_folder, pdf_name)
+                            digest = ArtifactManifest.digest(
+                                'pdf', PDF_LAYOUT_VERSION, self.pdf_renderer, self.thumbnail_dpi, sheet, photo_digests
+                            )
+                            self._submit_pdf_job(dict(sheet, output_path=pdf_path), digest)
+                        except Exception as err:
+                            logging.error(f"Failed to generate PDF for {course} in {room_id}: {err}")
         
-        for room_id in used_rooms:
-            room_info = next((r for r in allocator.rooms if r['Room No.'] == room_id), None)
-            if room_info:
-                used = allocator.usage[room_id]
-                self.all_capacity.append({
-                    'Date': folder_date,
-                    'Day': day,
-                    'Session': session,
-                    'Room No.': room_id,
-                    'Exam Capacity': room_info['Exam Capacity'],
-                    'Block': room_info['Block'],
-                    'Allotted': used,
-                    'Vacant': room_info['Exam Capacity'] - used
-                })
+        if bundle_sheets and self.attendance_output != 'file':
+            try:
+                pdf_path = os.path.join(docs_folder, f"{exam_date.strftime('%Y_%m_%d')}_{session.lower()}_bundle.pdf")
+                digest = ArtifactManifest.digest(
+                    'pdf-bundle', PDF_LAYOUT_VERSION, self.pdf_renderer, self.thumbnail_dpi, bundle_sheets, bundle_photos
+                )
+                self._submit_pdf_job({'output_path': pdf_path, 'sheets': bundle_sheets}, digest)
+            except Exception as err:
+                logging.error(f"Failed to generate attendance bundle for {date_str} {session}: {err}")
+        
+        if session_sheets:
+            excel_path = os.path.join(output_path, f"{folder_date}_{session}.xlsx")
+            digest = ArtifactManifest.digest('session-excel', EXCEL_LAYOUT_VERSION, date_str, session, session_sheets)
+            if not self.manifest.is_fresh(excel_path, 'excel', digest):
+                SessionWorkbookWriter.write(excel_path, date_str, session, session_sheets)
+                self.manifest.record_built(excel_path, 'excel', digest)
+                logging.info(f"✓ Wrote {len(session_sheets)} room sheets to {excel_path}")
+        
+        logging.info(f"✓ Generated {len(plan['rooms'])} room files (Excel + PDF)")
+    
+    def _submit_pdf_job(self, job, digest):
+        """Reuses the PDF if its inputs are unchanged, else renders it now or queues it for the batch renderer."""
+        pdf_path = job['output_path']
+        if self.manifest.is_fresh(pdf_path, 'pdf', digest):
+            self.generated_pdfs.append(pdf_path)
+        elif self.doc_builder is None:
+            self.pdf_jobs.append(job)
+            self.pdf_job_digests.append(digest)
+        elif self.doc_builder.render_job(job):
+            self.generated_pdfs.append(pdf_path)
+            self.manifest.record_built(pdf_path, 'pdf', digest)
+
+
+_worker_scheduler = None
+
+
+def _init_session_worker(scheduler, output_dir, photos_dir, profile_dir=None):
+    """Installs the shared scheduler and directory settings in a pool worker."""
+    global _worker_scheduler, OUTPUT_DIRECTORY, PHOTOS_DIRECTORY
+    OUTPUT_DIRECTORY = output_dir
+    PHOTOS_DIRECTORY = photos_dir
+    _worker_scheduler = scheduler
+    if profile_dir:
+        metrics.enable_profiling(profile_dir, clear=False)
+
+
+def _run_session_in_worker(task):
+    """Processes one (date, session) task and returns its report rows."""
+    scheduler = _worker_scheduler
+    scheduler.all_seating = []
+    scheduler.all_capacity = []
+    scheduler.generated_pdfs = []
+    scheduler.pdf_jobs = []
+    scheduler.pdf_job_digests = []
+    scheduler.session_plans = []
+    scheduler.manifest.reset()
+    scheduler.allocation_cache.hits = scheduler.allocation_cache.misses = 0
+    metrics.reset()
+    
+    scheduler._run_session_task(task)
+    
+    return {
+        'seating': scheduler.all_seating,
+        'capacity': scheduler.all_capacity,
+        'pdfs': scheduler.generated_pdfs,
+        'pdf_jobs': scheduler.pdf_jobs,
+        'pdf_job_digests': scheduler.pdf_job_digests,
+        'plans': scheduler.session_plans,
+        'manifest': scheduler.manifest.export(),
+        'allocation_cache': (scheduler.allocation_cache.hits, scheduler.allocation_cache.misses),
+        'metrics': metrics.export(),
+        'pid': os.getpid(),
+        'photo_stats': scheduler.doc_builder.photo_mgr.cache_stats() if scheduler.doc_builder else None
+    }
+
+
+class ParameterSweep:
+    """Runs allocation only for many (strategy, buffer) configurations and tabulates the outcome."""
+    
+    REPORT_FILE = 'op_sweep_summary.xlsx'
+    
+    @staticmethod
+    def evaluate(timetable, enrollments, rooms, strategy, buffer, session_clashes, **options):
+        # Names are only needed for rendering, so the roll/name sheet is left empty
+        scheduler = ExamScheduler(timetable, enrollments, pd.DataFrame(columns=['Roll', 'Name']), rooms,
+                                  strategy, buffer, gen_docs=False, plan_only=True, **options)
+        scheduler.session_clashes = session_clashes
+        
+        failed = []
+        clashed = []
+        rooms_used = []
+        buildings = 0
+        seated = 0
+        seats = 0
+        unplaced = 0
+        
+        for idx, exam_date, date_str, day, session, row in scheduler._collect_session_tasks():
+            courses = CourseParser.extract_courses(row[session])
+            if not courses:
+                continue
+            
+            key = f"{date_str}:{session}"
+            # Clashes are a timetable problem no mode or buffer can fix, so they do not count as failures
+            if session_clashes.get((date_str, session)):
+                clashed.append(key)
+                continue
+            
+            enrolled = sum(scheduler.course_index.get_count(c) for c in set(courses))
+            plan = scheduler._plan_session(exam_date, date_str, day, session, row)
+            if plan is None:
+                failed.append(key)
+                unplaced += enrolled
+                continue
+            
+            course_blocks = defaultdict(set)
+            placed = 0
+            for room in plan['rooms']:
+                record = scheduler.room_registry.get(room['room'])
+                seats += record.effective_capacity if record else 0
+                for entry in room['courses']:
+                    course_blocks[entry['course']].add(room['block'])
+                    placed += len(entry['rolls'])
+            
+            missing = enrolled - placed
+            if missing > 0:
+                failed.append(key)
+                unplaced += missing
+            
+            rooms_used.append(len(plan['rooms']))
+            buildings += sum(len(blocks) for blocks in course_blocks.values())
+            seated += placed
+        
+        return {
+            'Mode': strategy,
+            'Buffer': buffer,
+            'Failed Sessions': len(failed),
+            'Unplaced Students': unplaced,
+            'Rooms Used': sum(rooms_used),
+            'Peak Rooms': max(rooms_used, default=0),
+            'Buildings Used': buildings,
+            'Utilization %': round(100 * seated / seats, 1) if seats else 0.0,
+            'Failures': ', '.join(failed),
+            'Clash Sessions': len(clashed),
+            'Clashes': ', '.join(clashed),
+        }
+    
+    @staticmethod
+    def run(timetable, enrollments, rooms, strategies, buffers, workers=1, **options):
+        clashes = ConflictDetector.find_clashes(timetable, enrollments)
+        session_clashes = ConflictDetector.group_by_session(clashes)
+        configs = [(strategy, buffer) for strategy in strategies for buffer in buffers]
+        logging.info(f"Sweeping {len(configs)} configurations across {min(workers, len(configs))} worker processes")
+        
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(configs)),
+            initializer=_init_sweep_worker,
+            initargs=(timetable, enrollments, rooms, session_clashes, options)
+        ) as pool:
+            rows = list(pool.map(_run_sweep_config, configs))
+        
+        summary = pd.DataFrame(rows)
+        logging.info("\n" + summary.drop(columns=['Failures', 'Clashes']).to_string(index=False))
         
-        logging.info(f"✓ Generated {len(assignments)} room files (Excel + PDF)")
+        path = os.path.join(OUTPUT_DIRECTORY, ParameterSweep.REPORT_FILE)
+        os.makedirs(OUTPUT_DIRECTORY, exist_ok=True)
+        summary.to_excel(path, index=False)
+        logging.info(f"✓ Wrote sweep summary: {path}")
+        
+        if session_clashes:
+            logging.warning(f"{len(session_clashes)} sessions have student clashes and are left out of every "
+                            f"configuration: {summary['Clashes'].iloc[0]}")
+        
+        feasible = summary[summary['Failed Sessions'] == 0]
+        if feasible.empty:
+            logging.warning("No configuration allocates every session")
+        else:
+            best = feasible.sort_values(['Buffer', 'Rooms Used'], ascending=[False, True]).iloc[0]
+            logging.info(f"Largest buffer that fits every session: {best['Mode']} {best['Buffer']}")
+        return summary
+
+
+_sweep_context = None
+
 
+def _init_sweep_worker(timetable, enrollments, rooms, session_clashes, options):
+    """Keeps the sweep inputs in the worker; per-session allocation logs are silenced."""
+    global _sweep_context
+    logging.getLogger().setLevel(logging.CRITICAL)
+    _sweep_context = (timetable, enrollments, rooms, session_clashes, options)
 
-def import_excel_data(filepath):
+
+def _run_sweep_config(config):
+    timetable, enrollments, rooms, session_clashes, options = _sweep_context
+    strategy, buffer = config
+    return ParameterSweep.evaluate(timetable, enrollments, rooms, strategy, buffer, session_clashes, **options)
+
+
+def import_excel_data(filepath, use_cache=True):
     """Wrapper function for backward compatibility."""
-    loader = DataLoader(filepath)
+    loader = DataLoader(filepath, use_cache=use_cache)
     return loader.load_all_sheets()
 
 
-def execute_arrangement_process(schedule, enrollment, student_reg, venue, strategy, buffer, create_docs=True):
+def execute_arrangement_process(schedule, enrollment, student_reg, venue, strategy, buffer, create_docs=True, workers=1, pdf_workers=1,
+                                thumbnail_dpi=THUMBNAIL_DPI, plan_only=False, plan_path=None, excel_output='room',
+                                force_render=False, rebuild=False, allocator='greedy',
+                                allocator_budget=OPTIMAL_TIME_BUDGET, pdf_renderer='platypus', attendance_output='file'):
     """Wrapper function for backward compatibility."""
-    scheduler = ExamScheduler(schedule, enrollment, student_reg, venue, strategy, buffer, create_docs)
-    return scheduler.process_all_dates()
+    scheduler = ExamScheduler(schedule, enrollment, student_reg, venue, strategy, buffer, create_docs,
+                              workers, pdf_workers, thumbnail_dpi, plan_only, excel_output, force_render,
+                              rebuild, allocator, allocator_budget, pdf_renderer, attendance_output)
+    return scheduler.process_all_dates(plan_path)
+
+
+def render_allocation_plan(plan_path, selectors=None, create_docs=True, pdf_workers=1,
+                           thumbnail_dpi=THUMBNAIL_DPI, use_cache=True, excel_output='room',
+                           force_render=False, pdf_renderer='platypus', attendance_output='file'):
+    """Renders Excel/PDF output from a plan written with --plan-only."""
+    plan = AllocationPlan.load(plan_path)
+    timetable, course_roll, roll_name, room_cap = import_excel_data(plan['input_file'], use_cache=use_cache)
+    scheduler = ExamScheduler(timetable, course_roll, roll_name, room_cap, plan['strategy'], plan['buffer'],
+                              create_docs, pdf_workers=pdf_workers, thumbnail_dpi=thumbnail_dpi,
+                              excel_output=excel_output, force_render=force_render, pdf_renderer=pdf_renderer,
+                              attendance_output=attendance_output)
+    return scheduler.render_plan(plan, selectors)
 
 
 def configure_logger():
@@ -566,32 +1807,166 @@ def configure_logger():
     SystemLogger.setup_logging()
 
 
-if __name__ == "__main__":
-    configure_logger()
-    
-    if len(sys.argv) < 3 or len(sys.argv) > 4:
-        logging.error("Usage: python exam_scheduler.py <mode> <buffer> [--no-pdf]")
-        logging.error("Example: python exam_scheduler.py dense 5")
-        logging.error("         python exam_scheduler.py dense 5 --no-pdf")
-        sys.exit(1)
-    
-    mode = sys.argv[1].lower()
-    if mode not in ['sparse', 'dense']:
-        logging.error("Invalid mode. Choose 'sparse' or 'dense'.")
-        sys.exit(1)
-    
+def non_negative_int(value):
     try:
-        buff = int(sys.argv[2])
-        if buff < 0:
-            logging.error("Buffer must be a non-negative integer.")
-            sys.exit(1)
+        number = int(value)
     except ValueError:
-        logging.error("Buffer must be an integer.")
-        sys.exit(1)
+        raise argparse.ArgumentTypeError(f"Expected an integer, got '{value}'.")
+    if number < 0:
+        raise argparse.ArgumentTypeError("Value must be a non-negative integer.")
+    return number
+
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected an integer, got '{value}'.")
+    if number < 1:
+        raise argparse.ArgumentTypeError("Value must be at least 1.")
+    return number
+
+
+def positive_float(value):
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a number, got '{value}'.")
+    if number <= 0:
+        raise argparse.ArgumentTypeError("Value must be greater than 0.")
+    return number
+
+
+def add_output_arguments(parser):
+    parser.add_argument('--no-pdf', action='store_true',
+                        help="Skip attendance PDF generation")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-parse the input workbook instead of using the parsed-sheet cache")
+    parser.add_argument('--pdf-workers', type=positive_int, default=1,
+                        help="Render attendance PDFs in one batch across this many processes")
+    parser.add_argument('--thumbnail-dpi', type=non_negative_int, default=THUMBNAIL_DPI,
+                        help="Print resolution of cached photo thumbnails (0 embeds original photos)")
+    parser.add_argument('--excel-output', choices=['room', 'session'], default='room',
+                        help="One .xlsx per room/course (default) or one workbook per session")
+    parser.add_argument('--attendance-output', choices=['file', 'bundle', 'both'], default='file',
+                        help="One attendance PDF per room/course (default), one bookmarked PDF per session, or both")
+    parser.add_argument('--pdf-renderer', choices=PDF_RENDERERS, default='platypus',
+                        help="Lay attendance sheets out with platypus tables (default) or draw them "
+                             "directly on the canvas with fixed geometry (faster)")
+    parser.add_argument('--force-render', action='store_true',
+                        help="Rebuild every Excel/PDF file even if its inputs are unchanged")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"Write cProfile dumps and allocation summaries per stage to "
+                             f"{OUTPUT_DIRECTORY}/{PROFILE_DIRECTORY_NAME}/")
+
+
+def add_allocation_arguments(parser):
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Recompute every session allocation instead of reusing cached ones")
+    parser.add_argument('--allocator', choices=sorted(ALLOCATORS), default='greedy',
+                        help="Room allocation engine: greedy first-fit (default) or a session-wide optimal search")
+    parser.add_argument('--allocator-budget', type=positive_float, default=OPTIMAL_TIME_BUDGET,
+                        help=f"Seconds the optimal allocator may search per session (default: {OPTIMAL_TIME_BUDGET})")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Exam seating arrangement system",
+        epilog="Example: python exam_scheduler.py dense 5 --no-pdf "
+               "(see also: python exam_scheduler.py render --help, python exam_scheduler.py sweep --help)"
+    )
+    parser.add_argument('mode', type=str.lower, choices=['sparse', 'dense'],
+                        help="Seating mode")
+    parser.add_argument('buffer', type=non_negative_int,
+                        help="Buffer seats kept free in each room")
+    add_output_arguments(parser)
+    parser.add_argument('--workers', type=positive_int, default=1,
+                        help="Number of processes used to run sessions in parallel")
+    parser.add_argument('--plan-only', action='store_true',
+                        help="Write the allocation plan and reports without Excel/PDF room files")
+    parser.add_argument('--plan-file', default=None,
+                        help=f"Where --plan-only writes the plan (default: {OUTPUT_DIRECTORY}/{PLAN_FILE_NAME})")
+    add_allocation_arguments(parser)
+    return parser
+
+
+def build_render_parser():
+    parser = argparse.ArgumentParser(
+        prog="exam_scheduler.py render",
+        description="Render room Excel files and attendance PDFs from a saved allocation plan",
+        epilog="Example: python exam_scheduler.py render output/allocation_plan.json --sessions 01-05-2016:Evening"
+    )
+    parser.add_argument('plan', nargs='?', default=os.path.join(OUTPUT_DIRECTORY, PLAN_FILE_NAME),
+                        help="Plan file written by --plan-only")
+    parser.add_argument('--sessions', nargs='+', metavar='DD-MM-YYYY[:Session]',
+                        help="Only render these dates or date:session pairs")
+    add_output_arguments(parser)
+    return parser
+
+
+def buffer_values(value):
+    """Parses a buffer list item: 5, 0-10 or 0-20:5 (inclusive range with a step)."""
+    match = re.fullmatch(r'(\d+)(?:-(\d+)(?::(\d+))?)?', value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Expected N, N-M or N-M:STEP, got '{value}'.")
+    start, end, step = match.groups()
+    end = int(end) if end is not None else int(start)
+    step = int(step) if step else 1
+    if end < int(start) or step < 1:
+        raise argparse.ArgumentTypeError(f"Invalid buffer range '{value}'.")
+    return list(range(int(start), end + 1, step))
+
+
+def build_sweep_parser():
+    parser = argparse.ArgumentParser(
+        prog="exam_scheduler.py sweep",
+        description="Allocate every session for each (mode, buffer) combination without writing room files",
+        epilog="Example: python exam_scheduler.py sweep --buffers 0-10 15 20 --modes dense sparse"
+    )
+    parser.add_argument('--buffers', nargs='+', type=buffer_values, default=[list(range(0, 11))],
+                        metavar='N|N-M[:STEP]', help="Buffer values or inclusive ranges (default: 0-10)")
+    parser.add_argument('--modes', nargs='+', type=str.lower, choices=['sparse', 'dense'],
+                        default=['dense', 'sparse'], help="Seating modes to try (default: both)")
+    parser.add_argument('--workers', type=positive_int, default=os.cpu_count() or 1,
+                        help="Number of configurations evaluated in parallel (default: CPU count)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-read the input workbook instead of using the parsed-sheet cache")
+    add_allocation_arguments(parser)
+    return parser
+
+
+def run_sweep_command(argv):
+    args = build_sweep_parser().parse_args(argv)
+    buffers = sorted({value for values in args.buffers for value in values})
+    
+    timetable, course_roll, _, room_cap = import_excel_data(INPUT_FILE_PATH, use_cache=not args.no_cache)
+    ParameterSweep.run(
+        timetable, course_roll, room_cap, args.modes, buffers, args.workers,
+        rebuild=args.rebuild, allocator=args.allocator, allocator_budget=args.allocator_budget
+    )
+
+
+def run_render_command(argv):
+    args = build_render_parser().parse_args(argv)
+    if args.profile:
+        metrics.enable_profiling(os.path.join(OUTPUT_DIRECTORY, PROFILE_DIRECTORY_NAME))
+    
+    logging.info(f"Rendering allocation plan: {args.plan}")
+    render_allocation_plan(
+        args.plan, args.sessions, not args.no_pdf, args.pdf_workers,
+        args.thumbnail_dpi, use_cache=not args.no_cache, excel_output=args.excel_output,
+        force_render=args.force_render, pdf_renderer=args.pdf_renderer,
+        attendance_output=args.attendance_output
+    )
+
+
+def run_arrangement_command(argv):
+    args = build_arg_parser().parse_args(argv)
+    mode = args.mode
+    buff = args.buffer
     
-    create_docs = True
-    if len(sys.argv) == 4 and sys.argv[3] == '--no-pdf':
-        create_docs = False
+    create_docs = not args.no_pdf
+    if not create_docs:
         logging.info("PDF generation disabled (--no-pdf flag)")
     
     logging.info(f"\n{'='*80}")
@@ -599,20 +1974,51 @@ if __name__ == "__main__":
     logging.info(f"{'='*80}")
     logging.info(f"Mode: {mode.upper()}")
     logging.info(f"Buffer: {buff} seats per room")
+    if args.allocator != 'greedy':
+        logging.info(f"Allocator: {args.allocator} (budget {args.allocator_budget}s per session)")
+    if args.workers > 1:
+        logging.info(f"Workers: {args.workers}")
+    if args.plan_only:
+        logging.info("Plan only: room files and attendance sheets are not rendered")
+    if args.profile:
+        logging.info(f"Profiling: {os.path.join(OUTPUT_DIRECTORY, PROFILE_DIRECTORY_NAME)}")
+        metrics.enable_profiling(os.path.join(OUTPUT_DIRECTORY, PROFILE_DIRECTORY_NAME))
     logging.info(f"{'='*80}\n")
     
+    timetable, course_roll, roll_name, room_cap = import_excel_data(
+        INPUT_FILE_PATH, use_cache=not args.no_cache
+    )
+    
+    execute_arrangement_process(
+        timetable, course_roll, roll_name, room_cap, 
+        mode, buff, create_docs, args.workers, args.pdf_workers, args.thumbnail_dpi,
+        args.plan_only, args.plan_file, args.excel_output, args.force_render, args.rebuild,
+        args.allocator, args.allocator_budget, args.pdf_renderer, args.attendance_output
+    )
+
+
+COMMANDS = {
+    'render': run_render_command,
+    'sweep': run_sweep_command,
+}
+
+
+if __name__ == "__main__":
+    configure_logger()
+    
+    argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        command = COMMANDS[argv[0]]
+        argv = argv[1:]
+    else:
+        command = run_arrangement_command
+    
     try:
-        timetable, course_roll, roll_name, room_cap = import_excel_data(INPUT_FILE_PATH)
-        
-        execute_arrangement_process(
-            timetable, course_roll, roll_name, room_cap, 
-            mode, buff, create_docs
-        )
-        
+        command(argv)
         logging.info("✓✓✓ SCRIPT COMPLETED SUCCESSFULLY ✓✓✓")
         
     except Exception as err:
         logging.critical(f"\n{'='*80}")
         logging.critical(f"CRITICAL ERROR: {err}")
         logging.critical(f"{'='*80}\n", exc_info=True)
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
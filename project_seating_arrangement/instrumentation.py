@@ -0,0 +1,236 @@
+import io
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import pstats
+import logging
+import cProfile
+import functools
+import statistics
+import tracemalloc
+from contextlib import contextmanager
+from collections import defaultdict
+from datetime import datetime
+
+METRICS_FILE_NAME = 'run_metrics.json'
+PROFILE_DIRECTORY_NAME = 'profile'
+PROFILE_TOP_FUNCTIONS = 20
+PROFILE_TOP_ALLOCATIONS = 15
+PROFILE_MEMORY_EVERY = 10
+
+
+class StageProfiler:
+    """cProfile and tracemalloc capture around the pipeline's major stages.
+    
+    Only the outermost profiled stage is captured, because cProfile cannot nest profilers.
+    Memory is traced only inside sampled calls (the first, then every PROFILE_MEMORY_EVERY-th),
+    so the snapshot holds just what that call allocated and still held when it returned.
+    Every process writes <stage>.<pid>.prof / .mem.json files; write_summary merges them.
+    """
+    
+    STAGES = (
+        'load_workbook', 'clash_detection', 'plan_session', 'render_session',
+        'render_pdf_batch', 'generate_document', 'generate_bundle', 'generate_reports'
+    )
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.profiles = {}
+        self.calls = defaultdict(int)
+        self.allocations = defaultdict(dict)
+        self.peaks = defaultdict(int)
+        self.active = None
+        self.tracing = False
+    
+    def start(self, name):
+        if name not in self.STAGES or self.active is not None:
+            return False
+        self.active = name
+        self.tracing = self.calls[name] % PROFILE_MEMORY_EVERY == 0 and not tracemalloc.is_tracing()
+        self.calls[name] += 1
+        if self.tracing:
+            tracemalloc.start()
+        self.profiles.setdefault(name, cProfile.Profile()).enable()
+        return True
+    
+    def stop(self, name):
+        self.profiles[name].disable()
+        if self.tracing:
+            snapshot = tracemalloc.take_snapshot()
+            self.peaks[name] = max(self.peaks[name], tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            sites = self.allocations[name]
+            for stat in snapshot.statistics('lineno')[:PROFILE_TOP_ALLOCATIONS * 2]:
+                size, count = sites.get(str(stat.traceback[0]), (0, 0))
+                sites[str(stat.traceback[0])] = (size + stat.size, count + stat.count)
+        self.active = None
+        self.tracing = False
+        self._dump(name)
+    
+    def _dump(self, name):
+        base = os.path.join(self.directory, f"{name}.{os.getpid()}")
+        self.profiles[name].dump_stats(f"{base}.prof")
+        with open(f"{base}.mem.json", 'w') as f:
+            json.dump({
+                'sampled_calls': -(-self.calls[name] // PROFILE_MEMORY_EVERY),
+                'peak_bytes': self.peaks[name],
+                'sites': self.allocations[name],
+            }, f)
+    
+    def write_summary(self, stage_samples):
+        """Merges every process's dumps into summary.txt; stage_samples gives wall times per stage."""
+        lines = [f"Profile summary ({datetime.now().isoformat(timespec='seconds')})", ""]
+        
+        for name in self.STAGES:
+            dumps = sorted(glob.glob(os.path.join(self.directory, f"{name}.*.prof")))
+            if not dumps:
+                continue
+            
+            samples = stage_samples.get(name, [])
+            lines.append('=' * 100)
+            lines.append(f"Stage: {name} ({len(samples)} calls, {sum(samples):.3f}s wall, "
+                         f"{len(dumps)} process{'es' if len(dumps) > 1 else ''})")
+            lines.append('=' * 100)
+            
+            out = io.StringIO()
+            stats = pstats.Stats(*dumps, stream=out)
+            stats.sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+            lines.append(f"Top {PROFILE_TOP_FUNCTIONS} functions by cumulative time:")
+            lines.extend(line for line in out.getvalue().splitlines() if line.strip())
+            
+            sites = defaultdict(lambda: [0, 0])
+            sampled = 0
+            peak = 0
+            for path in glob.glob(os.path.join(self.directory, f"{name}.*.mem.json")):
+                with open(path) as f:
+                    memory = json.load(f)
+                sampled += memory['sampled_calls']
+                peak = max(peak, memory['peak_bytes'])
+                for site, (size, count) in memory['sites'].items():
+                    sites[site][0] += size
+                    sites[site][1] += count
+            
+            lines.append("")
+            lines.append(f"Top allocation sites (bytes still held when the stage returned, "
+                         f"summed over {sampled} sampled calls; peak traced {peak / 1024:.1f} KiB):")
+            top = sorted(sites.items(), key=lambda item: -item[1][0])[:PROFILE_TOP_ALLOCATIONS]
+            for site, (size, count) in top:
+                lines.append(f"  {size / 1024:12.1f} KiB  {count:8d} blocks  {site}")
+            lines.append("")
+        
+        path = os.path.join(self.directory, 'summary.txt')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines))
+        logging.info(f"✓ Wrote profile summary: {path}")
+        return path
+
+
+class RunMetrics:
+    """Collects wall-clock samples per pipeline stage and named counters for one run."""
+    
+    def __init__(self):
+        self.profiler = None
+        self.reset()
+    
+    def reset(self):
+        self.stages = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.started = time.time()
+        self.run_info = {}
+    
+    def enable_profiling(self, directory, clear=True):
+        """Profiles the major stages from now on; clear=False is used by pool workers."""
+        if clear:
+            shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+        # A forked worker can inherit the parent's active profiler hook
+        sys.setprofile(None)
+        self.profiler = StageProfiler(directory)
+    
+    def disable_profiling(self):
+        self.profiler = None
+    
+    @contextmanager
+    def stage(self, name):
+        profiling = self.profiler is not None and self.profiler.start(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name].append(time.perf_counter() - start)
+            if profiling:
+                self.profiler.stop(name)
+    
+    def timed(self, name):
+        """Decorator form of stage()."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def count(self, name, value=1):
+        self.counters[name] += value
+    
+    def count_file(self, path):
+        """Adds a written file to the bytes_written counter."""
+        try:
+            self.counters['bytes_written'] += os.path.getsize(path)
+        except OSError:
+            pass
+    
+    def export(self):
+        """Raw samples and counters, picklable so pool workers can hand them back."""
+        return {'stages': dict(self.stages), 'counters': dict(self.counters)}
+    
+    def merge(self, exported):
+        for name, samples in exported['stages'].items():
+            self.stages[name].extend(samples)
+        for name, value in exported['counters'].items():
+            self.counters[name] += value
+    
+    def summary(self):
+        stages = {}
+        for name, samples in self.stages.items():
+            ordered = sorted(samples)
+            stages[name] = {
+                'calls': len(ordered),
+                'total_s': round(sum(ordered), 4),
+                'p50_ms': round(1000 * statistics.median(ordered), 3),
+                'p95_ms': round(1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+                'max_ms': round(1000 * ordered[-1], 3),
+            }
+        return {
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'wall_s': round(time.time() - self.started, 3),
+            'stages': stages,
+            'counters': dict(sorted(self.counters.items())),
+        }
+    
+    def write(self, output_dir, run_info=None):
+        """Writes run_metrics.json; later calls (e.g. after zipping) keep the first call's run_info."""
+        if run_info is not None:
+            self.run_info = run_info
+        report = {'run': self.run_info}
+        report.update(self.summary())
+        
+        path = os.path.join(output_dir, METRICS_FILE_NAME)
+        os.makedirs(output_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        
+        logging.info(f"✓ Wrote run metrics: {path}")
+        
+        if self.profiler is not None:
+            self.profiler.write_summary(self.stages)
+        return path
+
+
+metrics = RunMetrics()
@@ -0,0 +1,69 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from openpyxl import load_workbook
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+
+def make_frames(rolls, sessions=None, rooms=None):
+    """Builds the four input frames the scheduler reads, as DataLoader returns them.
+    
+    sessions maps 'YYYY-MM-DD' to (morning, evening) course strings, by default CS101 and EE101
+    in one morning session. Rolls take the scheduled courses in turn, one course each, so nobody
+    clashes. Every roll gets a name.
+    """
+    sessions = sessions or {'2016-04-30': ('CS101; EE101', 'NO EXAM')}
+    courses = [c.strip() for slot in sessions.values() for s in slot
+               if isinstance(s, str) and s != 'NO EXAM' for c in s.split(';')]
+    enrollments = pd.DataFrame({
+        'rollno': list(rolls),
+        'course_code': [courses[i % len(courses)] for i in range(len(rolls))]
+    })
+    timetable = pd.DataFrame({
+        'Date': pd.to_datetime(list(sessions)),
+        'Day': [pd.Timestamp(d).day_name() for d in sessions],
+        'Morning': [m for m, _ in sessions.values()],
+        'Evening': [e for _, e in sessions.values()],
+    })
+    students = pd.DataFrame({'Roll': list(rolls), 'Name': [f"Student {r}" for r in rolls]})
+    rooms = rooms if rooms is not None else pd.DataFrame({
+        'Room No.': [6101, 6102, 10502, 'LT101'],
+        'Exam Capacity': [30, 30, 50, 90],
+        'Block': [6, 6, 10, 'LT'],
+    })
+    return timetable, enrollments, students, rooms
+
+
+def read_workbooks(folder):
+    """Returns {relative path: {sheet: rows}} for every .xlsx file under folder."""
+    books = {}
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.endswith('.xlsx'):
+                path = os.path.join(root, name)
+                wb = load_workbook(path, read_only=True)
+                books[os.path.relpath(path, folder)] = {
+                    ws.title: [list(row) for row in ws.iter_rows(values_only=True)] for ws in wb.worksheets
+                }
+                wb.close()
+    return books
+
+
+class WorkdirTestCase(unittest.TestCase):
+    """Runs each test inside a fresh temporary directory, since output/ and cache/ are cwd-relative."""
+    
+    def setUp(self):
+        self.previous_dir = os.getcwd()
+        self.workdir = tempfile.mkdtemp(prefix='seating-test-')
+        os.chdir(self.workdir)
+        os.makedirs('output')
+    
+    def tearDown(self):
+        os.chdir(self.previous_dir)
+        shutil.rmtree(self.workdir, ignore_errors=True)
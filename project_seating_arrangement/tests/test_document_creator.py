@@ -0,0 +1,130 @@
+import unittest
+from reportlab import rl_config
+from support import WorkdirTestCase
+from workload_generator import PhotoSetGenerator
+from instrumentation import metrics
+from document_creator import (
+    AttendanceSheetGenerator, CanvasSheetRenderer, CellCache, PhotoManager, NAME_MAX_LINES, PDF_RENDERERS
+)
+
+
+def make_students(count, prefix='1601CS'):
+    return [{'Roll Number': f"{prefix}{i:03d}", 'Student Name': f"Student {i}"} for i in range(count)]
+
+
+def make_generator(renderer, students=()):
+    PhotoSetGenerator.write([s['Roll Number'] for s in students], 'photos', fraction=0.8)
+    return AttendanceSheetGenerator('photos', 'photos/nopic.png', renderer=renderer)
+
+
+def sheet_args(path, students):
+    return dict(output_path=path, date='30-04-2016', day='Saturday', session='Morning',
+                room='6101', course='CS101', students=students, count=len(students))
+
+
+class StaticFormTest(WorkdirTestCase):
+    
+    def test_binary_streams_are_scoped_to_generated_pdfs(self):
+        self.addCleanup(setattr, rl_config, 'useA85', rl_config.useA85)
+        rl_config.useA85 = 1
+        students = make_students(20)
+        
+        for renderer in PDF_RENDERERS:
+            with self.subTest(renderer=renderer):
+                generator = make_generator(renderer, students)
+                self.assertTrue(generator.generate_document(**sheet_args(f"{renderer}.pdf", students)))
+                self.assertEqual(rl_config.useA85, 1)
+                
+                with open(f"{renderer}.pdf", 'rb') as f:
+                    data = f.read()
+                self.assertNotIn(b'ASCII85Decode', data)
+                self.assertIn(b'/Subtype /Form', data)
+
+
+class CellCacheTest(WorkdirTestCase):
+    
+    def test_reused_cells_render_the_same_sheet(self):
+        self.addCleanup(setattr, rl_config, 'invariant', rl_config.invariant)
+        rl_config.invariant = 1
+        students = make_students(45)
+        first, second = students[:30], students[15:]
+        
+        for renderer in PDF_RENDERERS:
+            with self.subTest(renderer=renderer):
+                warm = make_generator(renderer, students)
+                warm.generate_document(**sheet_args('first.pdf', first))
+                hits = metrics.counters['cell_cache_hits']
+                warm.generate_document(**sheet_args('warm.pdf', second))
+                self.assertEqual(metrics.counters['cell_cache_hits'] - hits, 15)
+                
+                make_generator(renderer).generate_document(**sheet_args('cold.pdf', second))
+                with open('warm.pdf', 'rb') as w, open('cold.pdf', 'rb') as c:
+                    self.assertEqual(w.read(), c.read())
+    
+    def test_cells_are_keyed_on_name_and_photo(self):
+        PhotoSetGenerator.write(['1601CS000'], 'photos', fraction=1.0)
+        photo_mgr = PhotoManager('photos', 'photos/nopic.png')
+        cache = CellCache(photo_mgr, size=2)
+        builds = []
+        
+        def build(roll, name):
+            builds.append((roll, name))
+            return (roll, name), (None, None)
+        
+        cache.get('1601CS000', 'Student 0', build)
+        cache.get('1601CS000', 'Student 0', build)
+        self.assertEqual(len(builds), 1)
+        
+        cache.get('1601CS000', 'Renamed', build)
+        self.assertEqual(len(builds), 2)
+        
+        photo_mgr.photo_cache['1601CS000'] = 'photos/nopic.png'
+        cache.get('1601CS000', 'Student 0', build)
+        self.assertEqual(len(builds), 3)
+        self.assertEqual(len(cache.cells), 2)
+        self.assertEqual(len(cache.take_images()), 4)
+
+
+class CanvasRendererTest(WorkdirTestCase):
+    
+    # Wraps to exactly NAME_MAX_LINES lines; longer names are cut short by the canvas renderer only
+    LONG_NAME = 'Venkata Satya Sai Lakshmi Narasimha Rao'
+    
+    @staticmethod
+    def pages_rendered(generator, path, students):
+        before = metrics.counters['pages_rendered']
+        generator.generate_document(**sheet_args(path, students))
+        return metrics.counters['pages_rendered'] - before
+    
+    def test_page_count_matches_platypus(self):
+        self.assertEqual(len(CanvasSheetRenderer.wrap_name(self.LONG_NAME)), NAME_MAX_LINES)
+        students = make_students(130)
+        for i in range(0, len(students), 7):
+            students[i]['Student Name'] = self.LONG_NAME
+        platypus, canvas = make_generator('platypus', students), make_generator('canvas')
+        
+        for count in (0, 1, 14, 15, 16, 45, 46, 75, 76, 130):
+            with self.subTest(students=count):
+                sheet = students[:count]
+                self.assertEqual(
+                    self.pages_rendered(canvas, 'canvas.pdf', sheet),
+                    self.pages_rendered(platypus, 'platypus.pdf', sheet)
+                )
+    
+    def test_bundle_page_count_matches_platypus(self):
+        students = make_students(60)
+        sheets = [dict(sheet_args(None, students[:n]), room=f"61{n:02d}") for n in (3, 16, 46, 60)]
+        for sheet in sheets:
+            del sheet['output_path']
+        platypus, canvas = make_generator('platypus', students), make_generator('canvas')
+        
+        pages = {}
+        for name, generator in (('platypus', platypus), ('canvas', canvas)):
+            before = metrics.counters['pages_rendered']
+            self.assertTrue(generator.generate_bundle(f"{name}.pdf", sheets))
+            pages[name] = metrics.counters['pages_rendered'] - before
+        self.assertEqual(pages['canvas'], pages['platypus'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+import os
+import json
+import shutil
+import logging
+import unittest
+import numpy as np
+import pandas as pd
+from unittest import mock
+from collections import defaultdict
+from support import WorkdirTestCase, make_frames, read_workbooks
+from exam_scheduler import (
+    AllocationCache, AllocationPlan, ConflictDetector, CourseParser, ExamScheduler, OptimalRoomAllocator,
+    RoomAllocator, RoomRegistry, StudentRegistry
+)
+
+SEASON = {
+    '2016-04-30': ('CS101; EE101; ME101', 'CS201; MA101'),
+    '2016-05-02': ('EE201', 'NO EXAM'),
+    '2016-05-03': ('CS301; EE301; ME301; PH101', 'HS101'),
+}
+
+
+def run_plan(frames, plan_path='output/plan.json', **options):
+    scheduler = ExamScheduler(*frames, 'dense', 5, plan_only=True, **options)
+    scheduler.process_all_dates(plan_path)
+    return scheduler, AllocationPlan.load(plan_path)
+
+
+def run_full(frames, **options):
+    """Runs allocation and room workbooks (no PDFs); returns the scheduler and every output workbook."""
+    scheduler = ExamScheduler(*frames, 'dense', 5, gen_docs=False, force_render=True, **options)
+    scheduler.process_all_dates()
+    return scheduler, read_workbooks('output')
+
+
+def planned_rolls(plan):
+    return [roll for s in plan['sessions'] for r in s['rooms'] for c in r['courses'] for roll in c['rolls']]
+
+
+class NumericRollTest(WorkdirTestCase):
+    """pandas reads all-digit roll numbers as int64; they must leave the registry as Python values."""
+    
+    ROLLS = [1601001 + i for i in range(60)]
+    
+    def test_decode_returns_python_values(self):
+        _, enrollments, students, _ = make_frames(self.ROLLS)
+        registry = StudentRegistry(students, enrollments)
+        
+        rolls = registry.decode(registry.encode(enrollments['rollno']))
+        self.assertEqual(rolls, self.ROLLS)
+        self.assertTrue(all(type(r) is int for r in rolls))
+    
+    def test_mixed_rolls_sort_numbers_first(self):
+        rolls = ['1601CS01', 1601002, '1601CS02', 1601001]
+        _, enrollments, students, _ = make_frames(rolls)
+        registry = StudentRegistry(students, enrollments)
+        
+        self.assertEqual(registry.decode(range(len(registry))), [1601001, 1601002, '1601CS01', '1601CS02'])
+    
+    def test_plan_and_cache_round_trip(self):
+        frames = make_frames(self.ROLLS)
+        
+        cold, plan = run_plan(frames)
+        self.assertEqual(sorted(planned_rolls(plan)), self.ROLLS)
+        self.assertEqual(len(os.listdir(cold.allocation_cache.cache_dir)), 1)
+        
+        warm, cached_plan = run_plan(frames)
+        self.assertEqual((warm.allocation_cache.hits, warm.allocation_cache.misses), (1, 0))
+        self.assertEqual(cached_plan, plan)
+        cache_dir = warm.allocation_cache.cache_dir
+        with open(os.path.join(cache_dir, os.listdir(cache_dir)[0])) as f:
+            entry = json.load(f)
+        self.assertTrue(all(type(r) is int for r in planned_rolls({'sessions': [entry]})))
+
+
+class AllocationCacheTest(WorkdirTestCase):
+    
+    def test_warm_run_matches_cold_run(self):
+        frames = make_frames([f"1601CS{i:03d}" for i in range(400)], SEASON)
+        
+        cold, cold_books = run_full(frames)
+        self.assertEqual((cold.allocation_cache.hits, cold.allocation_cache.misses), (0, 5))
+        self.assertGreater(len(cold_books), 10)
+        
+        warm, warm_books = run_full(frames)
+        self.assertEqual((warm.allocation_cache.hits, warm.allocation_cache.misses), (5, 0))
+        self.assertEqual(warm_books, cold_books)
+        
+        rebuilt, rebuilt_books = run_full(frames, rebuild=True)
+        self.assertEqual(rebuilt.allocation_cache.hits, 0)
+        self.assertEqual(rebuilt_books, cold_books)
+    
+    def test_store_raises_on_entries_that_are_not_json_safe(self):
+        cache = AllocationCache('cache')
+        with self.assertRaises(TypeError):
+            cache.store('key', {'rooms': [{'rolls': [object()]}]})
+        self.assertFalse(os.path.exists('cache') and os.listdir('cache'))
+    
+    def test_evict_skips_entries_removed_by_another_process(self):
+        cache = AllocationCache('cache')
+        for key in ('a', 'b', 'c'):
+            cache.store(key, {'rooms': None, 'reason': key})
+        cache.max_bytes = 0
+        
+        real_remove = os.remove
+        def remove_then_fail(path):
+            real_remove(path)
+            raise FileNotFoundError(path)
+        
+        with mock.patch('os.remove', side_effect=remove_then_fail):
+            cache.evict(keep='c')
+        self.assertEqual(os.listdir('cache'), ['c.json'])
+
+
+class ParallelRunTest(WorkdirTestCase):
+    
+    def test_workers_match_serial_run(self):
+        frames = make_frames([f"1601CS{i:03d}" for i in range(400)], SEASON)
+        
+        _, serial_books = run_full(frames)
+        shutil.rmtree('output')
+        os.makedirs('output')
+        _, parallel_books = run_full(frames, workers=3, rebuild=True)
+        
+        self.assertGreater(len(serial_books), 10)
+        self.assertEqual(parallel_books, serial_books)
+
+
+class BuildingCapacityTest(unittest.TestCase):
+    
+    ROOMS = pd.DataFrame({
+        'Room No.': [6101, 6102, 6201, 10502, 10503, 'LT101', 6101],
+        'Exam Capacity': [30, 30, 25, 50, 72, 90, 40],
+        'Block': [6, 6, 6, 10, 10, 'LT', 10],
+    })
+    
+    def test_incremental_totals_match_recomputed_capacity(self):
+        registry = RoomRegistry(self.ROOMS, 5)
+        sizes = [('CS101', 70), ('EE101', 45), ('CS101', 20), ('ME101', 2), ('MA101', 60), ('PH101', 9)]
+        
+        for strategy in ('dense', 'sparse'):
+            allocator = RoomAllocator(registry, strategy, quiet=True)
+            for course, count in sizes:
+                allocator.allocate_course(course, np.arange(count))
+                for block, rooms in registry.buildings.items():
+                    for probe in (course, 'NEW101'):
+                        with self.subTest(strategy=strategy, after=course, block=block, course=probe):
+                            expected = sum(
+                                allocator.get_available_capacity(r.room_id, probe, r.effective_capacity)
+                                for r in rooms
+                            )
+                            self.assertEqual(allocator.get_building_capacity(block, probe), expected)
+
+
+def loop_clashes(timetable, enrollments):
+    """The per-session loop find_clashes replaced: {(date, session): {roll: courses}}."""
+    rolls = {course: group.tolist() for course, group in enrollments.groupby('course_code', sort=False)['rollno']}
+    found = {}
+    for _, row in timetable.iterrows():
+        if pd.isna(row['Date']):
+            continue
+        for session in ConflictDetector.SESSIONS:
+            student_courses = defaultdict(list)
+            for course in dict.fromkeys(CourseParser.extract_courses(row[session])):
+                for roll in rolls.get(course, []):
+                    student_courses[roll].append(course)
+            clashes = {roll: courses for roll, courses in student_courses.items() if len(courses) > 1}
+            if clashes:
+                found[(row['Date'].strftime('%d-%m-%Y'), session)] = clashes
+    return found
+
+
+class ClashDetectionTest(unittest.TestCase):
+    
+    @staticmethod
+    def vectorized_clashes(timetable, enrollments):
+        by_session = ConflictDetector.group_by_session(ConflictDetector.find_clashes(timetable, enrollments))
+        return {key: dict(clashes) for key, clashes in by_session.items()}
+    
+    def test_matches_per_session_loop(self):
+        timetable, enrollments, _, _ = make_frames([f"1601CS{i:03d}" for i in range(400)], SEASON)
+        timetable = pd.concat([timetable, pd.DataFrame({
+            'Date': pd.to_datetime(['2016-05-04', None, '2016-05-05']),
+            'Day': ['Wednesday', None, 'Thursday'],
+            'Morning': [' CS101 ;EE101; CS101', 'CS201; MA101', None],
+            'Evening': ['no exam', 'CS301; EE301', 'ME101;'],
+        })], ignore_index=True)
+        extra = pd.DataFrame({
+            'rollno': ['1601CS000', '1601CS001', '1601CS002', '1601CS003', '1601CS003', 1601004, 1601004],
+            'course_code': ['EE101', 'ME101', 'MA101', 'HS101', 'HS101', 'CS301', 'PH101'],
+        })
+        enrollments = pd.concat([enrollments, extra], ignore_index=True)
+        
+        expected = loop_clashes(timetable, enrollments)
+        self.assertGreaterEqual(len(expected), 4)
+        self.assertEqual(self.vectorized_clashes(timetable, enrollments), expected)
+    
+    def test_timetable_without_exams(self):
+        _, enrollments, _, _ = make_frames([f"1601CS{i:03d}" for i in range(20)])
+        no_slots = pd.DataFrame({
+            'Date': pd.to_datetime(['2016-04-30', '2016-05-02']),
+            'Day': ['Saturday', 'Monday'],
+            'Morning': [None, None],
+            'Evening': [None, None],
+        })
+        for timetable in (no_slots, no_slots.iloc[:0]):
+            with self.subTest(rows=len(timetable)):
+                clashes = ConflictDetector.find_clashes(timetable, enrollments)
+                self.assertEqual(list(clashes.columns), ['Date', 'Session', 'Roll Number', 'Courses'])
+                self.assertTrue(clashes.empty)
+                self.assertEqual(self.vectorized_clashes(timetable, enrollments), {})
+
+
+class OptimalAllocatorTest(unittest.TestCase):
+    
+    def setUp(self):
+        _, _, _, rooms = make_frames([])
+        self.registry = RoomRegistry(rooms, 5)
+        self.courses = [('CS101', np.arange(70)), ('EE101', np.arange(70, 110)), ('ME101', np.arange(110, 130))]
+    
+    def test_greedy_probe_is_quiet_without_touching_logging_state(self):
+        self.addCleanup(logging.disable, logging.NOTSET)
+        logging.disable(logging.DEBUG)
+        OptimalRoomAllocator(self.registry, 'dense').allocate_session(self.courses)
+        self.assertEqual(logging.root.manager.disable, logging.DEBUG)
+        
+        logging.disable(logging.NOTSET)
+        with self.assertLogs(level=logging.INFO) as logs:
+            results = OptimalRoomAllocator(self.registry, 'dense').allocate_session(self.courses)
+        started = [line for line in logs.output if 'Allocating course' in line]
+        self.assertEqual(len(started), len(self.courses))
+        self.assertEqual([sum(len(a['students']) for a in allocations) for _, allocations in results], [70, 40, 20])
+
+
+if __name__ == '__main__':
+    unittest.main()
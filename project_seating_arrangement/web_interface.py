@@ -15,6 +15,7 @@ from exam_scheduler import (
     DataLoader, ExamScheduler, SystemLogger,
     MIN_ALLOCATION_SIZE, OUTPUT_DIRECTORY, PHOTOS_DIRECTORY
 )
+from instrumentation import metrics, PROFILE_DIRECTORY_NAME
 
 st.set_page_config(
     page_title="Exam Seating Arrangement System",
@@ -259,13 +260,17 @@ class ZipArchiveBuilder:
     @staticmethod
     def create_archive(source_dir):
         buffer = BytesIO()
-        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
-            for root, dirs, files in os.walk(source_dir):
-                for filename in files:
-                    full_path = os.path.join(root, filename)
-                    rel_path = os.path.relpath(full_path, source_dir)
-                    archive.write(full_path, rel_path)
-        
+        with metrics.stage('build_zip'):
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for root, dirs, files in os.walk(source_dir):
+                    for filename in files:
+                        full_path = os.path.join(root, filename)
+                        rel_path = os.path.relpath(full_path, source_dir)
+                        archive.write(full_path, rel_path)
+        
+        metrics.count('zip_bytes', buffer.tell())
+        # The archive already holds the run's metrics; the zip timing is added to the file on disk
+        metrics.write(source_dir)
         buffer.seek(0)
         return buffer
 
@@ -290,11 +295,12 @@ class DataFrameConverter:
 class ProcessingOrchestrator:
     """Orchestrates the main processing workflow."""
     
-    def __init__(self, excel_file, photos_zip, strategy, buffer):
+    def __init__(self, excel_file, photos_zip, strategy, buffer, profile=False):
         self.excel_file = excel_file
         self.photos_zip = photos_zip
         self.strategy = strategy
         self.buffer = buffer
+        self.profile = profile
     
     def process(self):
         workspace, data_dir, photos_dir, output_dir = WorkspaceManager.setup_workspace()
@@ -310,6 +316,11 @@ class ProcessingOrchestrator:
         status.success(f"✅ Extracted {photo_count} photo files")
         
         LoggingConfigurator.configure(output_dir)
+        metrics.reset()
+        if self.profile:
+            metrics.enable_profiling(os.path.join(output_dir, PROFILE_DIRECTORY_NAME))
+        else:
+            metrics.disable_profiling()
         
         sys.path.insert(0, os.getcwd())
         
@@ -421,11 +432,14 @@ class UIRenderer:
             )
         
         with c3:
-            st.markdown("<br>", unsafe_allow_html=True)
+            profile = st.checkbox(
+                "Profile run",
+                help="Write per-stage cProfile dumps and allocation snapshots to output/profile/"
+            )
             btn = st.button("🚀 Process Arrangement", type="primary", use_container_width=True)
         
         st.markdown("---")
-        return strategy, buffer, btn
+        return strategy, buffer, profile, btn
     
     @staticmethod
     def render_metrics(excel_count, pdf_count, report_count):
@@ -492,17 +506,17 @@ class Application:
         
         excel_upload, photos_upload = UIRenderer.render_file_uploaders()
         
-        strategy, buffer, process_btn = UIRenderer.render_config()
+        strategy, buffer, profile, process_btn = UIRenderer.render_config()
         
         if process_btn:
-            self._handle_processing(excel_upload, photos_upload, strategy, buffer)
+            self._handle_processing(excel_upload, photos_upload, strategy, buffer, profile)
         
         if st.session_state.processed:
             self._display_results()
         
         UIRenderer.render_footer()
     
-    def _handle_processing(self, excel, photos, strategy, buffer):
+    def _handle_processing(self, excel, photos, strategy, buffer, profile=False):
         if not excel:
             st.error("❌ Please upload the input Excel file!")
             return
@@ -513,7 +527,7 @@ class Application:
         
         with st.spinner("⏳ Processing... This may take a few minutes"):
             try:
-                orchestrator = ProcessingOrchestrator(excel, photos, strategy, buffer)
+                orchestrator = ProcessingOrchestrator(excel, photos, strategy, buffer, profile)
                 output_dir, seating_df, seats_df, pdf_count = orchestrator.process()
                 
                 st.session_state.processed = True
@@ -0,0 +1,339 @@
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+import numpy as np
+from collections import defaultdict
+from datetime import datetime, timedelta
+from openpyxl import Workbook
+from PIL import Image, ImageDraw
+
+INPUT_FILE_NAME = 'input_data_tt.xlsx'
+WORKLOAD_FILE_NAME = 'workload.json'
+DEFAULT_WORKLOAD_DIRECTORY = 'workload'
+WORKLOAD_PRESETS = {
+    'sample': {'students': 2000, 'courses': 120, 'rooms': 30, 'sessions': 14},
+    'medium': {'students': 10000, 'courses': 500, 'rooms': 120, 'sessions': 30},
+    'season': {'students': 50000, 'courses': 2000, 'rooms': 500, 'sessions': 60},
+}
+BRANCHES = ['CS', 'EE', 'ME', 'CE', 'CB', 'CH', 'MM', 'PH', 'MA', 'HS', 'EP', 'MH']
+# (program code, years on the rolls, share of students, course level for year 1..n)
+PROGRAMS = [
+    ('01', 4, 0.75, [1, 2, 3, 4]),
+    ('11', 2, 0.15, [5, 6]),
+    ('21', 3, 0.10, [6, 7, 7]),
+]
+ROOM_CAPACITIES = [25, 30, 30, 30, 55, 70, 72, 90]
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Ajit', 'Ananya', 'Arjun', 'Deepa', 'Divya', 'Gaurav', 'Harsh', 'Isha',
+    'Jaishree', 'Karan', 'Kavya', 'Manish', 'Meera', 'Nilesh', 'Neha', 'Pooja', 'Pranav', 'Priya',
+    'Rahul', 'Riya', 'Rohan', 'Sakshi', 'Sanjay', 'Shreya', 'Sudipta', 'Tanvi', 'Varun', 'Vikram'
+]
+LAST_NAMES = [
+    'Acharya', 'Agarwal', 'Bose', 'Chakraborty', 'Das', 'Gupta', 'Iyer', 'Joshi', 'Kumar', 'Mayank',
+    'Mehta', 'Mishra', 'Nair', 'Pandey', 'Patel', 'Rao', 'Reddy', 'Sharma', 'Singh', 'Verma'
+]
+ELECTIVE_SHARE = 0.25
+NAME_COVERAGE = 0.995
+PHOTO_SIZE = 120
+PNG_PHOTO_SHARE = 0.15
+
+
+class WorkloadGenerator:
+    """Builds a clash-free synthetic timetable with the four input sheets the scheduler reads.
+    
+    Students belong to cohorts (entry year, program, branch) and take mostly their cohort's core
+    courses plus a few same-level electives from other branches. Course popularity is log-normal,
+    so a few courses are large and many are small, like a real exam season. Each course sits in
+    one session and a student never takes two courses from the same session.
+    """
+    
+    def __init__(self, students, courses, rooms, sessions, courses_per_student=5.5, seed=0,
+                 start_date='2016-04-30'):
+        if min(students, courses, rooms, sessions) < 1:
+            raise ValueError("students, courses, rooms and sessions must all be positive")
+        self.num_students = students
+        self.num_courses = courses
+        self.num_rooms = rooms
+        self.num_sessions = sessions
+        self.courses_per_student = courses_per_student
+        self.seed = seed
+        self.start_date = datetime.strptime(start_date, '%Y-%m-%d')
+        self.rng = np.random.default_rng(seed)
+    
+    def build(self):
+        """Returns the four sheets as lists of rows, header first."""
+        cohorts, student_cohort, rolls = self._build_students()
+        codes, course_level, course_session, groups, popularity = self._build_courses(cohorts, student_cohort)
+        enrollments = self._build_enrollments(cohorts, student_cohort, rolls, codes, course_level,
+                                              course_session, groups, popularity)
+        return {
+            'in_timetable': self._build_timetable(codes, course_session),
+            'in_course_roll_mapping': enrollments,
+            'in_roll_name_mapping': self._build_names(rolls),
+            'in_room_capacity': self._build_rooms(),
+        }
+    
+    def _build_students(self):
+        cohorts = []
+        shares = []
+        branch_share = self.rng.dirichlet(np.full(len(BRANCHES), 8.0))
+        entry_year = self.start_date.year % 100
+        for program, years, program_share, levels in PROGRAMS:
+            for year in range(years):
+                for b, branch in enumerate(BRANCHES):
+                    cohorts.append((f"{entry_year - year - 1:02d}{program}{branch}", branch, levels[year]))
+                    shares.append(program_share / years * branch_share[b])
+        
+        shares = np.array(shares) / sum(shares)
+        student_cohort = np.sort(self.rng.choice(len(cohorts), size=self.num_students, p=shares))
+        
+        sizes = np.bincount(student_cohort, minlength=len(cohorts))
+        width = max(2, len(str(sizes.max())))
+        serials = np.arange(self.num_students) - np.repeat(np.cumsum(sizes) - sizes, sizes) + 1
+        rolls = [f"{cohorts[c][0]}{s:0{width}d}" for c, s in zip(student_cohort, serials)]
+        return cohorts, student_cohort, rolls
+    
+    def _build_courses(self, cohorts, student_cohort):
+        # Courses per (branch, level) follow the number of students taking that level in the branch
+        demand = defaultdict(int)
+        for c, size in enumerate(np.bincount(student_cohort, minlength=len(cohorts))):
+            _, branch, level = cohorts[c]
+            demand[(branch, level)] += size
+        groups = sorted(key for key, size in demand.items() if size > 0)
+        if len(groups) > self.num_courses:
+            groups = sorted(sorted(groups, key=lambda key: -demand[key])[:self.num_courses])
+        weights = np.array([demand[key] for key in groups], dtype=float)
+        
+        counts = 1 + self.rng.multinomial(self.num_courses - len(groups), weights / weights.sum())
+        
+        popularity = self.rng.lognormal(0.0, 1.0, self.num_courses)
+        core_load = self.courses_per_student * (1 - ELECTIVE_SHARE)
+        session_seats = np.zeros(self.num_sessions)
+        codes, course_level, course_session, members = [], [], [], {}
+        first = 0
+        for key, count in zip(groups, counts):
+            branch, level = key
+            share = popularity[first:first + count] / popularity[first:first + count].sum()
+            members[key] = list(range(first, first + count))
+            for n in range(count):
+                codes.append(f"{branch}{level}{n + 1:02d}")
+                course_level.append(level)
+            
+            # Most popular course first, each into the emptiest session the group has not used yet
+            sessions = np.zeros(count, dtype=int)
+            used = np.zeros(self.num_sessions, dtype=bool)
+            for n in np.argsort(-share):
+                if used.all():
+                    used[:] = False
+                sessions[n] = np.argmin(np.where(used, np.inf, session_seats))
+                used[sessions[n]] = True
+                session_seats[sessions[n]] += demand[key] * share[n] * min(count, core_load)
+            course_session.extend(sessions)
+            first += count
+        return codes, np.array(course_level), np.array(course_session), members, popularity
+    
+    def _build_enrollments(self, cohorts, student_cohort, rolls, codes, course_level, course_session, groups,
+                           popularity):
+        everything = (np.arange(len(codes)), popularity / popularity.sum())
+        by_level = {}
+        for level in np.unique(course_level):
+            pool = np.flatnonzero(course_level == level)
+            by_level[level] = (pool, popularity[pool] / popularity[pool].sum())
+        core = {}
+        for key, pool in groups.items():
+            pool = np.array(pool)
+            core[key] = (pool, popularity[pool] / popularity[pool].sum())
+        
+        loads = np.clip(self.rng.poisson(self.courses_per_student, self.num_students), 1, self.num_sessions)
+        rows = [['rollno', 'register_sem', 'schedule_sem', 'course_code']]
+        for student, (c, load) in enumerate(zip(student_cohort, loads)):
+            _, branch, level = cohorts[c]
+            semester = 2 * level if level <= 4 else 2
+            pool, p = core.get((branch, level)) or by_level.get(level, everything)
+            core_load = min(load - int(self.rng.binomial(load, ELECTIVE_SHARE)), len(pool))
+            
+            picked = list(self.rng.choice(pool, size=core_load, replace=False, p=p))
+            if core_load < load:
+                # Draw spare electives so that ones clashing with a core course can be skipped
+                pool, p = by_level.get(level, everything)
+                picked.extend(self.rng.choice(pool, size=min(2 * (load - core_load), len(pool)), replace=False, p=p))
+            
+            used = set()
+            taken = 0
+            for course in picked:
+                if taken == load or course_session[course] in used:
+                    continue
+                used.add(course_session[course])
+                taken += 1
+                rows.append([rolls[student], semester, semester, codes[course]])
+        return rows
+    
+    def _build_timetable(self, codes, course_session):
+        by_session = [[] for _ in range(self.num_sessions)]
+        for code, session in zip(codes, course_session):
+            by_session[session].append(code)
+        
+        rows = [['Date', 'Day', 'Morning', 'Evening']]
+        for day in range((self.num_sessions + 1) // 2):
+            date = self.start_date + timedelta(days=day)
+            cells = []
+            for session in (2 * day, 2 * day + 1):
+                courses = by_session[session] if session < self.num_sessions else []
+                cells.append('; '.join(courses) if courses else 'NO EXAM')
+            rows.append([date, date.strftime('%A'), *cells])
+        return rows
+    
+    def _build_names(self, rolls):
+        first = self.rng.choice(FIRST_NAMES, len(rolls))
+        last = self.rng.choice(LAST_NAMES, len(rolls))
+        known = self.rng.random(len(rolls)) < NAME_COVERAGE
+        rows = [['Roll', 'Name']]
+        rows.extend([roll, f"{f} {l}"] for roll, f, l, k in zip(rolls, first, last, known) if k)
+        return rows
+    
+    def _build_rooms(self):
+        """Room numbers are <floor><block><nn>, matching FloorCalculator's first-digit floor rule."""
+        blocks = -(-self.num_rooms // 120)
+        floors = min(9, -(-self.num_rooms // (blocks * 12)))
+        per_floor = -(-self.num_rooms // (blocks * floors))
+        if blocks > 9 or per_floor > 99:
+            raise ValueError(f"Cannot number {self.num_rooms} rooms as <floor><block><nn>")
+        
+        rows = [['Room No.', 'Exam Capacity', 'Block']]
+        for index in range(self.num_rooms):
+            block, rest = divmod(index, floors * per_floor)
+            floor, number = divmod(rest, per_floor)
+            capacity = int(self.rng.choice(ROOM_CAPACITIES))
+            rows.append([int(f"{floor + 1}{block + 1}{number + 1:02d}"), capacity, f"B{block + 1}"])
+        return rows
+    
+    @staticmethod
+    def write_workbook(sheets, path):
+        wb = Workbook(write_only=True)
+        for name, rows in sheets.items():
+            ws = wb.create_sheet(name)
+            for row in rows:
+                ws.append(row)
+        wb.save(path)
+
+
+class PhotoSetGenerator:
+    """Draws a distinct placeholder portrait per roll number, as JPEG or PNG like the real photo set."""
+    
+    @staticmethod
+    def write(rolls, photos_dir, fraction=0.9, size=PHOTO_SIZE, seed=0):
+        os.makedirs(photos_dir, exist_ok=True)
+        rng = np.random.default_rng(seed)
+        chosen = [roll for roll, keep in zip(rolls, rng.random(len(rolls)) < fraction) if keep]
+        colours = rng.integers(40, 230, size=(len(chosen), 2, 3))
+        as_png = rng.random(len(chosen)) < PNG_PHOTO_SHARE
+        
+        for roll, (background, face), png in zip(chosen, colours, as_png):
+            image = Image.new('RGB', (size, size), tuple(int(v) for v in background))
+            draw = ImageDraw.Draw(image)
+            draw.ellipse((size * 0.3, size * 0.12, size * 0.7, size * 0.55), fill=tuple(int(v) for v in face))
+            draw.rectangle((size * 0.18, size * 0.62, size * 0.82, size), fill=tuple(int(v) // 2 for v in face))
+            if png:
+                image.save(os.path.join(photos_dir, f"{roll}.png"))
+            else:
+                image.save(os.path.join(photos_dir, f"{roll}.jpg"), quality=85)
+        
+        PhotoSetGenerator._write_placeholder(photos_dir, size)
+        return len(chosen)
+    
+    @staticmethod
+    def _write_placeholder(photos_dir, size):
+        source = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'photos', 'nopic.png')
+        target = os.path.join(photos_dir, 'nopic.png')
+        if os.path.exists(source):
+            shutil.copyfile(source, target)
+        else:
+            Image.new('RGB', (size, size), (200, 200, 200)).save(target)
+
+
+def generate_workload(output_dir, students, courses, rooms, sessions, seed=0, photos=True,
+                      photo_fraction=0.9):
+    """Writes <output_dir>/input/input_data_tt.xlsx, <output_dir>/photos/ and a workload.json
+    describing them; the scheduler can then be run from inside output_dir."""
+    params = {'students': students, 'courses': courses, 'rooms': rooms, 'sessions': sessions,
+              'seed': seed, 'photos': photos, 'photo_fraction': photo_fraction}
+    
+    sheets = WorkloadGenerator(students, courses, rooms, sessions, seed=seed).build()
+    input_dir = os.path.join(output_dir, 'input')
+    os.makedirs(input_dir, exist_ok=True)
+    WorkloadGenerator.write_workbook(sheets, os.path.join(input_dir, INPUT_FILE_NAME))
+    
+    photos_dir = os.path.join(output_dir, 'photos')
+    shutil.rmtree(photos_dir, ignore_errors=True)
+    photo_count = 0
+    if photos:
+        rolls = [row[0] for row in sheets['in_roll_name_mapping'][1:]]
+        photo_count = PhotoSetGenerator.write(rolls, photos_dir, photo_fraction, seed=seed)
+    
+    counts = {
+        'enrollments': len(sheets['in_course_roll_mapping']) - 1,
+        'named_students': len(sheets['in_roll_name_mapping']) - 1,
+        'timetable_days': len(sheets['in_timetable']) - 1,
+        'photos': photo_count,
+    }
+    with open(os.path.join(output_dir, WORKLOAD_FILE_NAME), 'w') as f:
+        json.dump({'params': params, 'counts': counts}, f, indent=2)
+    
+    logging.info(f"✓ Wrote workload to {output_dir}: {students} students, {courses} courses, "
+                 f"{rooms} rooms, {sessions} sessions, {counts['enrollments']} enrollments, "
+                 f"{photo_count} photos")
+    return params, counts
+
+
+def load_workload_info(output_dir):
+    """The workload.json written by generate_workload, or None if the directory has none."""
+    try:
+        with open(os.path.join(output_dir, WORKLOAD_FILE_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def add_workload_arguments(parser):
+    parser.add_argument('--preset', choices=sorted(WORKLOAD_PRESETS), default='sample',
+                        help="Scale to start from; --students/--courses/--rooms/--sessions override it")
+    for name in ['students', 'courses', 'rooms', 'sessions']:
+        parser.add_argument(f'--{name}', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-photos', action='store_true',
+                        help="Skip the photo set (every attendance sheet uses nopic.png)")
+    parser.add_argument('--photo-fraction', type=float, default=0.9,
+                        help="Share of students that get a photo; the rest exercise the nopic fallback")
+
+
+def workload_params(args):
+    params = dict(WORKLOAD_PRESETS[args.preset])
+    for name in params:
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+    params.update(seed=args.seed, photos=not args.no_photos, photo_fraction=args.photo_fraction)
+    return params
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic input workbook and photo set for scale testing",
+        epilog="Example: python workload_generator.py --preset season --output-dir workload"
+    )
+    add_workload_arguments(parser)
+    parser.add_argument('--output-dir', default=DEFAULT_WORKLOAD_DIRECTORY,
+                        help="Directory to write input/, photos/ and workload.json into")
+    return parser
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    arguments = build_arg_parser().parse_args()
+    try:
+        generate_workload(arguments.output_dir, **workload_params(arguments))
+    except ValueError as err:
+        logging.error(f"Invalid workload: {err}")
+        sys.exit(1)